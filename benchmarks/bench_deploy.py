@@ -0,0 +1,57 @@
+"""Benchmark del despliegue de LORAs: copia frente a los demás modos de deploy.Deployer.
+
+Uso:
+    python benchmarks/bench_deploy.py [--models 30] [--size-mb 64] [--modes copy auto symlink hardlink reflink]
+
+Crea --models modelos sintéticos de --size-mb MB con su .json y su preview
+y los despliega en una carpeta de salida con cada modo, como hace Apply.
+Los modos que el sistema de archivos no admite acaban en copia (se ve en la
+columna de métodos).
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=30)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--modes", nargs="+", default=["copy", "auto", "symlink", "hardlink", "reflink"])
+    args = parser.parse_args()
+
+    from deploy import Deployer
+
+    with tempfile.TemporaryDirectory() as root:
+        library = os.path.join(root, "lib")
+        os.mkdir(library)
+        chunk = os.urandom(1024 * 1024)
+        files = []
+        for i in range(args.models):
+            for ext, size in ((".safetensors", args.size_mb), (".json", 0), (".preview.png", 0)):
+                path = os.path.join(library, f"model_{i:03d}{ext}")
+                with open(path, "wb") as f:
+                    for _ in range(size):
+                        f.write(chunk)
+                    f.write(b"{}")
+                files.append(path)
+        print(f"{args.models} modelos de {args.size_mb} MB ({len(files)} archivos)")
+        print(f"{'modo':<10} {'s':>8}  métodos")
+        for mode in args.modes:
+            out = os.path.join(root, f"out_{mode}")
+            os.mkdir(out)
+            deployer = Deployer(mode)
+            start = time.perf_counter()
+            for path in files:
+                deployer.deploy(path, os.path.join(out, os.path.basename(path)))
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<10} {elapsed:>8.3f}  {deployer.summary()}")
+
+
+if __name__ == "__main__":
+    main()
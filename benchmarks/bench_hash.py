@@ -0,0 +1,100 @@
+"""Micro-benchmark de los modos de hashing (read / readinto / mmap).
+
+Uso:
+    python benchmarks/bench_hash.py [--size-mb 1024] [--repeat 3] [--file ruta]
+
+Cada medición se hace en un subproceso independiente para que el pico de RSS
+(ru_maxrss) de un modo no contamine al siguiente. Si no se indica --file se
+genera un archivo temporal aleatorio del tamaño pedido.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hashing import sha256_file, HASH_MODES, DEFAULT_CHUNK_SIZE
+
+
+def _legacy_hash(path):
+    # Implementación anterior de CivitaiAPI.hash_file (bloques de 1 MiB)
+    return sha256_file(path, chunk_size=1024 * 1024, mode="read")
+
+
+def _measure(path, mode):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "legacy":
+        digest = _legacy_hash(path)
+    else:
+        digest = sha256_file(path, chunk_size=DEFAULT_CHUNK_SIZE, mode=mode)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    size = os.path.getsize(path)
+    return {
+        "mode": mode,
+        "digest": digest,
+        "seconds": elapsed,
+        "mb_s": size / (1024 * 1024) / elapsed if elapsed else 0.0,
+        # ru_maxrss está en KiB en Linux
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    }
+
+
+def _make_file(size_mb):
+    fd, path = tempfile.mkstemp(suffix=".safetensors")
+    block = os.urandom(1024 * 1024)
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(*args.child)))
+        return
+
+    path = args.file or _make_file(args.size_mb)
+    try:
+        modes = ("legacy",) + HASH_MODES
+        results = {m: [] for m in modes}
+        for _ in range(args.repeat):
+            for mode in modes:
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", path, mode],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                results[mode].append(json.loads(out))
+        digests = {r["digest"] for runs in results.values() for r in runs}
+        print(f"Archivo: {path} ({os.path.getsize(path) / (1024 * 1024):.0f} MiB), repeticiones: {args.repeat}")
+        print(f"{'modo':<10} {'MB/s (mejor)':>13} {'MB/s (media)':>13} {'pico RSS MB':>12} {'Δ RSS MB':>9}")
+        for mode in modes:
+            runs = results[mode]
+            best = max(r["mb_s"] for r in runs)
+            mean = sum(r["mb_s"] for r in runs) / len(runs)
+            peak = max(r["peak_rss_mb"] for r in runs)
+            growth = max(r["rss_growth_mb"] for r in runs)
+            print(f"{mode:<10} {best:>13.1f} {mean:>13.1f} {peak:>12.1f} {growth:>9.1f}")
+        print("Hashes coinciden" if len(digests) == 1 else "ERROR: los hashes no coinciden")
+    finally:
+        if not args.file:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
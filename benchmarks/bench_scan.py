@@ -0,0 +1,125 @@
+"""Benchmark del emparejado de sidecars: búsqueda por modelo frente a mapa por nombre base.
+
+Uso:
+    python benchmarks/bench_scan.py [--models 2500] [--repeat 5]
+
+Crea una carpeta plana sintética con --models modelos y, por cada uno, su
+.preview.png, su .json y un .civitai.info (unos 10k archivos por defecto).
+Uno de cada diez modelos no tiene preview para forzar los fallbacks.
+
+- legacy: lo que hacía load_loras: por cada .safetensors recorre el listado
+  completo de la carpeta hasta tres veces (preview con .preview, preview con
+  el nombre y config) y hace os.path.exists para los fallbacks. O(n²).
+- map: sidecars.scan_sidecars (un os.scandir) y búsquedas en el dict de
+  grupos por nombre base. O(n).
+
+Se muestra el mejor tiempo de --repeat pasadas y las llamadas a os.stat.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _make_folder(folder, models):
+    for i in range(models):
+        name = f"model_{i:05d}"
+        suffixes = [".safetensors", ".json", ".civitai.info"]
+        if i % 10:
+            suffixes.append(".preview.png")
+        for suffix in suffixes:
+            open(os.path.join(folder, name + suffix), "w").close()
+
+
+def _legacy(folder):
+    results = []
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            if not file.lower().endswith('.safetensors'):
+                continue
+            lora_name = os.path.splitext(file)[0]
+            preview_path = None
+            config_path = None
+            preview_base = f"{lora_name}.preview"
+            for img_file in files:
+                if img_file.lower().startswith(preview_base.lower()) and img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
+                    preview_path = os.path.join(root, img_file)
+                    break
+            if preview_path is None:
+                for img_file in files:
+                    if img_file.lower().startswith(lora_name.lower()) and img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
+                        preview_path = os.path.join(root, img_file)
+                        break
+            for config_file in files:
+                config_base = os.path.splitext(config_file)[0]
+                if config_base == lora_name and config_file.lower().endswith(('.yaml', '.yml', '.json')):
+                    config_path = os.path.join(root, config_file)
+                    break
+            if preview_path is None:
+                preview_path = os.path.join(root, f"{lora_name}.preview.png")
+                if not os.path.exists(preview_path):
+                    preview_path = os.path.join(root, "preview.png")
+            results.append((os.path.join(root, file), preview_path, config_path))
+    return results
+
+
+def _map(folder):
+    from sidecars import scan_sidecars
+    results = []
+    groups, files, subdirs = scan_sidecars(folder)
+    for group in groups.values():
+        if group.model is None:
+            continue
+        lora_name = os.path.splitext(group.model)[0]
+        results.append((os.path.join(folder, group.model), group.preview(folder), group.config(folder, lora_name)))
+    return results
+
+
+def _measure(func, folder, repeat):
+    real_stat = os.stat
+    calls = [0]
+
+    def counting_stat(*args, **kwargs):
+        calls[0] += 1
+        return real_stat(*args, **kwargs)
+
+    best = None
+    os.stat = counting_stat
+    try:
+        for _ in range(repeat):
+            calls[0] = 0
+            start = time.perf_counter()
+            results = func(folder)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        os.stat = real_stat
+    return best, calls[0], results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        _make_folder(folder, args.models)
+        n_files = len(os.listdir(folder))
+        print(f"{n_files} archivos, {args.models} modelos en una carpeta")
+        print(f"{'método':<8} {'mejor s':>9} {'stats':>7}")
+        outputs = {}
+        for name, func in (("legacy", _legacy), ("map", _map)):
+            best, stats, results = _measure(func, folder, args.repeat)
+            outputs[name] = sorted(results)
+            print(f"{name:<8} {best:>9.3f} {stats:>7}")
+        if outputs["legacy"] != outputs["map"]:
+            print("AVISO: los resultados de ambos métodos difieren")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark de la búsqueda de la galería: subcadena lineal frente a SearchIndex.
+
+Uso:
+    python benchmarks/bench_search.py [--loras 20000] [--repeat 5] [--budget-ms 16]
+
+Genera --loras entradas sintéticas (nombre, carpeta y trainedWords hechos de
+sílabas comunes, para que haya muchas coincidencias parciales) y mide para
+varias consultas:
+
+- linear: lo que hacía filter_loras, buscar el texto en nombre + carpeta de
+  cada entrada (sin trainedWords ni tolerancia a errores).
+- index: SearchIndex.search más la ordenación por relevancia.
+
+También se muestra lo que cuesta construir el índice (la aplicación lo hace
+al cargar la carpeta, no en la primera tecla). Cada búsqueda con índice debe
+caber en --budget-ms (un frame a 60 Hz): si alguna se pasa, el benchmark
+termina con error.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SYLLABLES = ['ani', 'me', 'sty', 'le', 'real', 'istic', 'pix', 'el', 'art', 'chi', 'bi', 'neo', 'cyber',
+             'punk', 'water', 'color', 'oil', 'paint', 'sketch', 'line']
+QUERIES = ['a', 'an', 'ani', 'anime', 'cyberpunk', 'cybrpunk', 'watercolor oil', 'zzz']
+
+
+def _word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def _entries(n):
+    rng = random.Random(1)
+    return [(f"/loras/{i}.safetensors", f"{_word(rng)}_{_word(rng)}_v{i % 7}", f"f{i % 50}/{_word(rng)}",
+             [_word(rng), f"{_word(rng)} {_word(rng)}"]) for i in range(n)]
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loras", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=16.0)
+    args = parser.parse_args()
+
+    from search_index import SearchIndex
+    entries = _entries(args.loras)
+    keys = [f"{name} {folder}".lower() for _, name, folder, _ in entries]
+    index = SearchIndex()
+    for path, name, folder, words in entries:
+        index.add(path, name, words, folder)
+    start = time.perf_counter()
+    index.flush()
+    print(f"{args.loras} LoRAs, índice construido en {time.perf_counter() - start:.3f}s")
+    print(f"{'consulta':<16} {'linear ms':>10} {'hits':>6} {'index ms':>9} {'hits':>6}")
+    over = []
+    for query in QUERIES:
+        text = query.lower()
+        linear, hits = _best(lambda: [i for i, key in enumerate(keys) if text in key], args.repeat)
+
+        def ranked():
+            scores = index.search(query)
+            return sorted(scores, key=scores.get, reverse=True)
+
+        indexed, ranked_hits = _best(ranked, args.repeat)
+        print(f"{query!r:<16} {linear * 1000:>10.1f} {len(hits):>6} {indexed * 1000:>9.1f} {len(ranked_hits):>6}")
+        if indexed * 1000 > args.budget_ms:
+            over.append(query)
+    if over:
+        sys.exit(f"Por encima de {args.budget_ms:g} ms por tecla: {', '.join(map(repr, over))}")
+    print(f"Todas las búsquedas caben en {args.budget_ms:g} ms por tecla")
+
+
+if __name__ == "__main__":
+    main()
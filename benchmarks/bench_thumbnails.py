@@ -0,0 +1,141 @@
+"""Benchmark de generación de miniaturas: ruta antigua frente a decodificación escalada.
+
+Uso:
+    python benchmarks/bench_thumbnails.py [--count 20] [--width 2048] [--height 3072] [--size 250]
+
+- legacy: Pillow decodifica el preview completo, thumbnail(), se codifica a PNG
+  en un BytesIO y QPixmap lo vuelve a decodificar (lo que hacía
+  create_thumbnail_widget).
+- scaled: thumbnail_cache.decode_thumbnail (QImageReader.setScaledSize o
+  Pillow draft) y QPixmap.fromImage, sin buffer PNG intermedio.
+
+Cada combinación formato/método se mide en un subproceso para obtener su pico
+de RSS por separado (en Linux se reinicia VmHWM tras importar las librerías,
+así el pico refleja sólo la decodificación; en otros sistemas, ru_maxrss).
+Se usa la plataforma Qt "offscreen" salvo que QT_QPA_PLATFORM indique otra.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+METHODS = ("legacy", "scaled")
+
+
+def _make_previews(folder, fmt, count, width, height):
+    from PIL import Image, ImageDraw
+    paths = []
+    for i in range(count):
+        img = Image.effect_mandelbrot((width, height), (-2.0 + i * 0.01, -1.5, 1.0, 1.5), 100).convert("RGB")
+        ImageDraw.Draw(img).text((20, 20), f"preview {i}", fill=(255, 0, 0))
+        path = os.path.join(folder, f"preview_{i}.{fmt}")
+        img.save(path, format=FORMATS[fmt])
+        paths.append(path)
+    return paths
+
+
+def _legacy(path, size):
+    from io import BytesIO
+    from PIL import Image
+    from PyQt6.QtGui import QPixmap
+    img = Image.open(path)
+    img.thumbnail((size, size))
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    pixmap = QPixmap()
+    pixmap.loadFromData(buffer.getvalue(), "PNG")
+    return pixmap
+
+
+def _scaled(path, size):
+    from PyQt6.QtGui import QPixmap
+    from thumbnail_cache import decode_thumbnail
+    return QPixmap.fromImage(decode_thumbnail(path, size))
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(folder, method, size):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv[:1])
+    func = _legacy if method == "legacy" else _scaled
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder))
+    # Calentar imports y plugins de imagen antes de medir
+    func(paths[0], size)
+    _reset_peak_rss()
+    rss_before = _peak_rss_kb()
+    latencies = []
+    for path in paths:
+        start = time.perf_counter()
+        pixmap = func(path, size)
+        latencies.append(time.perf_counter() - start)
+        assert not pixmap.isNull()
+    rss_after = _peak_rss_kb()
+    latencies.sort()
+    del app
+    return {
+        "mean_ms": 1000 * sum(latencies) / len(latencies),
+        "p95_ms": 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--width", type=int, default=2048)
+    parser.add_argument("--height", type=int, default=3072)
+    parser.add_argument("--size", type=int, default=250)
+    parser.add_argument("--child", nargs=2, metavar=("FOLDER", "METHOD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.child[0], args.child[1], args.size)))
+        return
+
+    print(f"{args.count} previews de {args.width}x{args.height} por formato, miniatura {args.size}px")
+    print(f"{'formato':<8} {'método':<8} {'media ms':>9} {'p95 ms':>8} {'pico RSS MB':>12} {'Δ RSS MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            folder = os.path.join(tmp, fmt)
+            os.makedirs(folder)
+            _make_previews(folder, fmt, args.count, args.width, args.height)
+            for method in METHODS:
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--size", str(args.size), "--child", folder, method],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{fmt:<8} {method:<8} {r['mean_ms']:>9.1f} {r['p95_ms']:>8.1f} {r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
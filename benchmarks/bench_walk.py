@@ -0,0 +1,68 @@
+"""Benchmark del recorrido de carpetas: os.walk frente a ParallelWalker con latencia simulada.
+
+Uso:
+    python benchmarks/bench_walk.py [--dirs 400] [--latency-ms 5] [--workers 1 4 8 16]
+
+Crea un árbol sintético de --dirs carpetas (4 modelos por carpeta) y simula
+un montaje de red añadiendo --latency-ms a cada listado de carpeta. Se
+compara os.walk (secuencial) con ParallelWalker para cada valor de --workers
+y se muestra la tasa de carpetas por segundo.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _make_tree(root, n_dirs):
+    folders = [root]
+    for i in range(n_dirs):
+        # Árbol con ramas de 8 subcarpetas
+        folder = os.path.join(folders[i // 8], f"dir_{i:04d}")
+        os.mkdir(folder)
+        folders.append(folder)
+        for j in range(4):
+            open(os.path.join(folder, f"model_{j}.safetensors"), "w").close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dirs", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    from parallel_walker import ParallelWalker, list_dir
+    latency = args.latency_ms / 1000
+
+    def slow_scandir(folder):
+        time.sleep(latency)
+        return list_dir(folder)
+
+    with tempfile.TemporaryDirectory() as root:
+        _make_tree(root, args.dirs)
+        print(f"{args.dirs + 1} carpetas, {args.latency_ms} ms de latencia por listado")
+        print(f"{'método':<14} {'s':>7} {'carpetas/s':>11} {'modelos':>8}")
+
+        start = time.perf_counter()
+        n_models = 0
+        for dirpath, dirs, files in os.walk(root):
+            time.sleep(latency)
+            n_models += sum(f.endswith('.safetensors') for f in files)
+        elapsed = time.perf_counter() - start
+        print(f"{'os.walk':<14} {elapsed:>7.2f} {(args.dirs + 1) / elapsed:>11.0f} {n_models:>8}")
+
+        for workers in args.workers:
+            walker = ParallelWalker(workers)
+            n_models = sum(sum(f.endswith('.safetensors') for f in files)
+                           for _, files in walker.walk(root, slow_scandir))
+            dirs_rate, _ = walker.rate()
+            print(f"{f'walker x{workers}':<14} {walker.elapsed:>7.2f} {dirs_rate:>11.0f} {n_models:>8}")
+
+
+if __name__ == "__main__":
+    main()
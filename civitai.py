@@ -1,22 +1,56 @@
 import os
-import hashlib
-import requests
 import json
+import requests
+from http_client import HttpClient
+from download_scheduler import DownloadScheduler
+from parallel_walker import ParallelWalker
+from hashing import sha256_file, sha256_file_resumable, DEFAULT_CHUNK_SIZE, RESUMABLE_MIN_SIZE
 
 CIVITAI_API_URL = "https://civitai.com/api/v1"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+PARTIAL_SUFFIX = ".part"
+# Prioridades en el planificador de descargas (menor = antes)
+PRIORITY_MAIN_PREVIEW = 0
+PRIORITY_FILE = 1
+PRIORITY_EXTRA_PREVIEW = 2
 
 class CivitaiAPI:
-    def __init__(self, api_key=None, log_func=None):
+    def __init__(self, api_key=None, log_func=None, hash_cache=None, hash_mode="readinto",
+                 response_cache=None, force_refresh=False, http_client=None,
+                 download_chunk_size=DOWNLOAD_CHUNK_SIZE, download_attempts=5, download_scheduler=None,
+                 walk_workers=8):
         self.api_key = api_key
         self.log_func = log_func  # función para logs opcional
+        self.hash_cache = hash_cache  # HashCache opcional para no re-hashear archivos sin cambios
+        self.hash_mode = hash_mode  # "read", "readinto" o "mmap" (ver hashing.sha256_file)
+        self.response_cache = response_cache  # ResponseCache opcional para las consultas por hash
+        self.force_refresh = force_refresh  # Ignorar la caché de respuestas (pero sí actualizarla)
+        self.http = http_client or HttpClient(log_func=log_func)  # Sesión compartida por todas las peticiones
+        self._owns_http = http_client is None
+        self.download_chunk_size = download_chunk_size
+        self.download_attempts = download_attempts  # Intentos (reanudando con Range) por descarga
+        self.downloads = download_scheduler or DownloadScheduler()  # Concurrencia, límite por host y ancho de banda
+        self._owns_downloads = download_scheduler is None
+        self.walk_workers = walk_workers  # Carpetas que se listan a la vez en process_lora_folder
         self._preview_callback = None
         self._json_callback = None
 
+    def close(self):
+        """Cierra la sesión HTTP y el planificador de descargas si los creó esta instancia.
+
+        Los que se pasaron al constructor son de quien los creó y siguen abiertos.
+        """
+        if self._owns_downloads:
+            self.downloads.close()
+        if self._owns_http:
+            self.http.close()
+
     def set_api_key(self, api_key):
         self.api_key = api_key
 
     def set_log_func(self, log_func):
         self.log_func = log_func
+        self.http.log_func = log_func
 
     def set_preview_callback(self, cb):
         self._preview_callback = cb
@@ -30,23 +64,114 @@ class CivitaiAPI:
             headers["Authorization"] = f"Bearer {self.api_key}"
         return headers
 
-    def hash_file(self, file_path, chunk_size=1024*1024):
+    def hash_file(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE, cancel_check=None):
         """Calcula el hash SHA256 de un archivo (safetensors)."""
-        sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        return sha256_file(file_path, chunk_size=chunk_size, mode=self.hash_mode, cancel_check=cancel_check)
+
+    def get_file_hash(self, file_path, cancel_check=None):
+        """Devuelve el SHA256 del archivo usando la caché si el archivo no ha cambiado.
+
+        Los archivos muy grandes se hashean con checkpoints en la caché, de forma
+        que si se cancela (cancel_check) el siguiente intento continúa donde se quedó.
+        """
+        if self.hash_cache is None:
+            return self.hash_file(file_path, cancel_check=cancel_check)
+        st = os.stat(file_path)
+        file_hash = self.hash_cache.get(file_path, st)
+        if file_hash is None:
+            if st.st_size >= RESUMABLE_MIN_SIZE:
+                checkpoint = self.hash_cache.get_partial(file_path, st)
+                if checkpoint and self.log_func:
+                    self.log_func(f"Reanudando hash de {os.path.basename(file_path)} desde {checkpoint.get('offset', 0) // (1024 * 1024)} MiB")
+                file_hash = sha256_file_resumable(
+                    file_path,
+                    checkpoint=checkpoint,
+                    save_checkpoint=lambda cp: self.hash_cache.put_partial(file_path, cp, st),
+                    cancel_check=cancel_check,
+                )
+            else:
+                file_hash = self.hash_file(file_path, cancel_check=cancel_check)
+            self.hash_cache.put(file_path, file_hash, st)
+        return file_hash
 
     def get_model_info_by_hash(self, file_hash):
         """Busca información de un modelo en Civitai por hash."""
+        if self.response_cache is not None and not self.force_refresh:
+            found, data = self.response_cache.get(file_hash)
+            if found:
+                return data
+        return self._lookup_one(file_hash)
+
+    def _lookup_one(self, file_hash):
+        """Consulta un hash a la API (sin mirar la caché) y guarda la respuesta."""
         url = f"{CIVITAI_API_URL}/model-versions/by-hash/{file_hash}"
-        resp = requests.get(url, headers=self.get_headers())
+        resp = self.http.get(url, headers=self.get_headers())
+        if self.response_cache is not None:
+            self.response_cache.count_lookups()
         if resp.status_code == 200:
-            return resp.json()
+            data = resp.json()
+            if self.response_cache is not None:
+                self.response_cache.put(file_hash, data)
+            return data
         else:
+            # Sólo un 404 significa "Civitai no conoce este hash"; otros errores no se cachean
+            if resp.status_code == 404 and self.response_cache is not None:
+                self.response_cache.put(file_hash, None)
             return None
 
+    def get_model_info_by_hashes(self, hashes, batch_size=100):
+        """Busca varios hashes a la vez con POST /model-versions/by-hash.
+
+        Devuelve un dict {hash en minúsculas: info o None}. Si una petición en
+        bloque falla, los hashes de ese bloque se consultan uno a uno.
+        """
+        results = {}
+        pending = []
+        for file_hash in hashes:
+            key = file_hash.lower()
+            if key in results or key in pending:
+                continue
+            if self.response_cache is not None and not self.force_refresh:
+                found, data = self.response_cache.get(key)
+                if found:
+                    results[key] = data
+                    continue
+            pending.append(key)
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            try:
+                found = self._lookup_batch(batch)
+            except Exception as e:
+                if self.log_func:
+                    self.log_func(f"Consulta en bloque fallida ({e}); consultando {len(batch)} hashes uno a uno")
+                for key in batch:
+                    results[key] = self._lookup_one(key)
+                continue
+            if self.response_cache is not None:
+                self.response_cache.count_lookups(len(batch))
+            for key in batch:
+                data = found.get(key)
+                if self.response_cache is not None:
+                    self.response_cache.put(key, data)
+                results[key] = data
+        return results
+
+    def _lookup_batch(self, batch):
+        url = f"{CIVITAI_API_URL}/model-versions/by-hash"
+        resp = self.http.post(url, json=batch, headers=self.get_headers())
+        if resp.status_code != 200:
+            raise Exception(f"HTTP {resp.status_code}")
+        wanted = set(batch)
+        found = {}
+        # La respuesta es una lista de versiones; se asocian a los hashes pedidos por files[].hashes
+        for version in resp.json() or []:
+            for file in version.get("files", []):
+                for value in (file.get("hashes") or {}).values():
+                    key = str(value).lower()
+                    if key in wanted:
+                        found[key] = version
+        return found
+
     def download_model_files(self, model_info, dest_folder, safetensor_path=None):
         """Descarga todos los archivos de metadatos relevantes del modelo (preview, config, json, yaml, etc), pero NO el safetensor. Además guarda la respuesta completa de la API en un .json con el mismo nombre que el safetensor."""
         if not model_info:
@@ -68,6 +193,37 @@ class CivitaiAPI:
                     self.log_func(f"Guardada respuesta de la API en: {json_path}")
                 if self._json_callback:
                     self._json_callback()
+        # Las descargas se encolan en el planificador (concurrentes, con límite
+        # por host); el preview principal va primero y los extra, al final
+        jobs = []
+        planned = set()
+
+        def enqueue(url, dest_path, priority, message, is_preview, **kwargs):
+            planned.add(dest_path)
+
+            def run():
+                if self.log_func:
+                    self.log_func(message)
+                self._download_file(url, dest_path, **kwargs)
+                if is_preview and self._preview_callback:
+                    self._preview_callback()
+            job = self.downloads.submit(run, url, priority)
+            jobs.append((dest_path, job))
+            return job
+
+        # Descargar SIEMPRE la primera imagen del array images como .preview.ext_img
+        first_job = None
+        if safetensor_path and model_info.get("images"):
+            first_img = model_info["images"][0]
+            img_url = first_img.get("url")
+            if img_url:
+                ext_img = os.path.splitext(img_url)[1]
+                preview_path = os.path.splitext(safetensor_path)[0] + f".preview{ext_img}"
+                if not os.path.exists(preview_path):
+                    first_job = enqueue(img_url, preview_path, PRIORITY_MAIN_PREVIEW,
+                                        f"Descargando primer preview principal: {os.path.basename(preview_path)} → {preview_path}", True)
+                else:
+                    planned.add(preview_path)
         # Descargar archivos de metadatos (NO el safetensor)
         for file in model_info.get("files", []):
             file_url = file.get("downloadUrl")
@@ -82,29 +238,18 @@ class CivitaiAPI:
                         if self.log_func:
                             self.log_func(f"Archivo GGUF ya existe, no se descarga: {file_name}")
                         continue
-                    need_download = True
-                    if os.path.exists(dest_path):
-                        # Si ya existe, no lo contamos
-                        need_download = False
+                    expected_size, expected_sha256 = self._expected_file_info(file)
+                    need_download = dest_path not in planned
+                    if need_download and os.path.exists(dest_path):
+                        # Si ya existe y su tamaño cuadra, no lo contamos
+                        need_download = not self._size_matches(os.path.getsize(dest_path), expected_size)
+                        if need_download and self.log_func:
+                            self.log_func(f"Archivo incompleto o corrupto, se vuelve a descargar: {file_name}")
                     if need_download:
-                        if self.log_func:
-                            self.log_func(f"Descargando archivo de metadatos: {file_name} → {dest_path}")
-                        self._download_file(file_url, dest_path)
-                        if self._preview_callback and ext in [".png", ".jpg", ".jpeg", ".webp"]:
-                            self._preview_callback()
-        # Descargar SIEMPRE la primera imagen del array images como .preview.ext_img
-        if safetensor_path and model_info.get("images"):
-            first_img = model_info["images"][0]
-            img_url = first_img.get("url")
-            if img_url:
-                ext_img = os.path.splitext(img_url)[1]
-                preview_path = os.path.splitext(safetensor_path)[0] + f".preview{ext_img}"
-                if not os.path.exists(preview_path):
-                    if self.log_func:
-                        self.log_func(f"Descargando primer preview principal: {os.path.basename(preview_path)} → {preview_path}")
-                    self._download_file(img_url, preview_path)
-                    if self._preview_callback:
-                        self._preview_callback()
+                        enqueue(file_url, dest_path, PRIORITY_FILE,
+                                f"Descargando archivo de metadatos: {file_name} → {dest_path}",
+                                ext in [".png", ".jpg", ".jpeg", ".webp"],
+                                expected_size=expected_size, expected_sha256=expected_sha256)
         # Descargar imágenes de preview y renombrarlas
         # Si hay un safetensor o gguf, usar ese nombre base
         base_preview = None
@@ -116,6 +261,9 @@ class CivitaiAPI:
                 if f.lower().endswith('.gguf'):
                     base_preview = os.path.splitext(os.path.join(dest_folder, f))[0]
                     break
+        # Los previews extra no se encolan hasta que llega el principal
+        if first_job is not None:
+            first_job.wait()
         # --- Renombrado incremental para previews ---
         preview_count = 0
         for img in model_info.get("images", []):
@@ -127,41 +275,104 @@ class CivitaiAPI:
                 else:
                     preview_name = base_preview + f".{preview_count}.preview{ext}"
                 dest_path = preview_name
-                need_download = True
-                if os.path.exists(dest_path):
-                    need_download = False
-                if need_download:
-                    if self.log_func:
-                        self.log_func(f"Descargando imagen de preview: {os.path.basename(dest_path)} → {dest_path}")
-                    self._download_file(img_url, dest_path)
-                    if self._preview_callback:
-                        self._preview_callback()
+                if dest_path not in planned and not os.path.exists(dest_path):
+                    enqueue(img_url, dest_path,
+                            PRIORITY_MAIN_PREVIEW if preview_count == 0 else PRIORITY_EXTRA_PREVIEW + preview_count,
+                            f"Descargando imagen de preview: {os.path.basename(dest_path)} → {dest_path}", True)
                 preview_count += 1
+        errors = []
+        for dest_path, job in jobs:
+            job.wait()
+            if job.error is not None:
+                if self.log_func:
+                    self.log_func(f"❌ Error descargando {os.path.basename(dest_path)}: {job.error}")
+                errors.append(job.error)
+        if errors:
+            raise errors[0]
         return True
 
-    def _download_file(self, url, dest_path):
-        resp = requests.get(url, headers=self.get_headers(), stream=True)
-        if resp.status_code == 200:
-            with open(dest_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        else:
-            raise Exception(f"Error downloading {url}: {resp.status_code}")
+    @staticmethod
+    def _expected_file_info(file):
+        """Tamaño aproximado (bytes) y SHA256 que Civitai declara para un elemento de files[]."""
+        size_kb = file.get("sizeKB")
+        expected_size = int(size_kb * 1024) if isinstance(size_kb, (int, float)) and size_kb > 0 else None
+        expected_sha256 = (file.get("hashes") or {}).get("SHA256")
+        return expected_size, expected_sha256.lower() if expected_sha256 else None
+
+    @staticmethod
+    def _size_matches(actual, expected):
+        # sizeKB viene redondeado, así que se admite 1 KiB de diferencia
+        return expected is None or abs(actual - expected) <= 1024
+
+    def _download_file(self, url, dest_path, expected_size=None, expected_sha256=None):
+        """Descarga a un .part, reanuda con Range tras un corte, verifica y renombra.
+
+        El archivo final sólo aparece (con os.replace, atómico) cuando la
+        descarga está completa y, si se conocen, tamaño y SHA256 coinciden.
+        """
+        tmp_path = dest_path + PARTIAL_SUFFIX
+        total = None
+        attempt = 0
+        while True:
+            offset = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+            headers = self.get_headers()
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            try:
+                with self.http.get(url, headers=headers, stream=True) as resp:
+                    if resp.status_code == 416 and offset:
+                        # El .part ya contiene todo el archivo
+                        break
+                    if resp.status_code == 206 and offset:
+                        mode = "ab"
+                        content_range = resp.headers.get("Content-Range", "")
+                        if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                            total = int(content_range.rsplit("/", 1)[1])
+                    elif resp.status_code == 200:
+                        # El servidor no admite Range (o no había .part): empezar de cero
+                        mode = "wb"
+                        length = resp.headers.get("Content-Length")
+                        total = int(length) if length and length.isdigit() else None
+                    else:
+                        raise Exception(f"Error downloading {url}: {resp.status_code}")
+                    with open(tmp_path, mode) as f:
+                        for chunk in resp.iter_content(chunk_size=self.download_chunk_size):
+                            self.downloads.limiter.consume(len(chunk))
+                            f.write(chunk)
+                break
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                attempt += 1
+                if attempt >= self.download_attempts:
+                    raise Exception(f"Error downloading {url}: {e}")
+                if self.log_func:
+                    self.log_func(f"Descarga interrumpida ({os.path.basename(dest_path)}), reanudando...")
+        size = os.path.getsize(tmp_path)
+        if total is not None and size != total:
+            os.remove(tmp_path)
+            raise Exception(f"Error downloading {url}: tamaño {size} distinto del esperado {total}")
+        if not self._size_matches(size, expected_size):
+            os.remove(tmp_path)
+            raise Exception(f"Error downloading {url}: tamaño {size} distinto del declarado por Civitai {expected_size}")
+        if expected_sha256 and sha256_file(tmp_path) != expected_sha256:
+            os.remove(tmp_path)
+            raise Exception(f"Error downloading {url}: el SHA256 no coincide")
+        os.replace(tmp_path, dest_path)
 
     def process_lora_folder(self, lora_folder, recursive=True):
         """Busca todos los safetensors en la carpeta y subcarpetas, busca info en Civitai y descarga/actualiza archivos de metadatos (NO el safetensor)."""
         results = []
-        for root, dirs, files in os.walk(lora_folder):
-            for file in files:
-                if file.lower().endswith('.safetensors'):
-                    safetensor_path = os.path.join(root, file)
-                    file_hash = self.hash_file(safetensor_path)
-                    model_info = self.get_model_info_by_hash(file_hash)
-                    if model_info:
-                        self.download_model_files(model_info, root, safetensor_path=safetensor_path)
-                        results.append((safetensor_path, True))
-                    else:
-                        results.append((safetensor_path, False))
-            if not recursive:
-                break
+        walker = ParallelWalker(self.walk_workers)
+        for root, file in walker.iter_models(lora_folder, recursive=recursive):
+            safetensor_path = os.path.join(root, file)
+            file_hash = self.get_file_hash(safetensor_path)
+            model_info = self.get_model_info_by_hash(file_hash)
+            if model_info:
+                self.download_model_files(model_info, root, safetensor_path=safetensor_path)
+                results.append((safetensor_path, True))
+            else:
+                results.append((safetensor_path, False))
+        if self.log_func:
+            self.log_func(walker.summary())
+        if self.hash_cache is not None:
+            self.hash_cache.save()
         return results
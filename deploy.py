@@ -0,0 +1,140 @@
+import os
+import sys
+import shutil
+
+# Modos de despliegue en output_path; 'auto' prueba los demás en este orden
+DEPLOY_MODES = ('auto', 'symlink', 'hardlink', 'reflink', 'copy')
+_AUTO_ORDER = ('symlink', 'hardlink', 'reflink', 'copy')
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int)): clona un archivo entero en Btrfs, XFS, bcachefs...
+_FICLONE = 0x40049409
+
+
+def _clonefile_func():
+    """clonefile() de macOS (APFS) o None si no está disponible."""
+    if sys.platform != 'darwin':
+        return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = libc.clonefile
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32)
+    return func
+
+
+_clonefile = _clonefile_func()
+
+
+def reflink(src, dst):
+    """Copia dst de src compartiendo sus bloques (copy-on-write).
+
+    Lanza OSError si el sistema de archivos no lo admite o si src y dst no
+    están en el mismo volumen.
+    """
+    if _clonefile is not None:
+        if _clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            import ctypes
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), dst)
+        return
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(f"reflink no disponible en {sys.platform}")
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'xb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+    shutil.copystat(src, dst)
+
+
+def _symlink(src, dst):
+    os.symlink(os.path.abspath(src), dst)
+
+
+def _hardlink(src, dst):
+    os.link(src, dst)
+
+
+_METHODS = {
+    'symlink': _symlink,
+    'hardlink': _hardlink,
+    'reflink': reflink,
+    'copy': shutil.copy2,
+}
+
+
+def is_deployed_copy(src, dst):
+    """Indica si dst es un despliegue previo de src (enlace, mismo archivo o copia con el mismo tamaño y mtime)."""
+    if os.path.islink(dst):
+        return True
+    try:
+        if os.path.samefile(src, dst):
+            return True
+        src_stat, dst_stat = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+class Deployer:
+    """Despliega archivos de la biblioteca en output_path sin copiarlos si se puede.
+
+    Con mode 'auto' prueba enlace simbólico, enlace duro (mismo volumen),
+    reflink (clon copy-on-write) y, como último recurso, copia; el primer
+    método que funciona para una pareja (volumen de origen, carpeta de
+    destino) se recuerda para los siguientes archivos. Con un modo concreto
+    se usa ese y, si falla, copia. Un despliegue crea el destino con un
+    nombre temporal y lo mueve encima del anterior, así que nunca queda a
+    medias. counts guarda cuántos archivos se han desplegado con cada método.
+    """
+
+    def __init__(self, mode='auto'):
+        self.mode = mode if mode in DEPLOY_MODES else 'auto'
+        self._pair_method = {}  # (st_dev de origen, carpeta de destino) -> método
+        self.counts = {}
+
+    def _candidates(self, key):
+        if self.mode != 'auto':
+            return (self.mode, 'copy') if self.mode != 'copy' else ('copy',)
+        known = self._pair_method.get(key)
+        if known is None:
+            return _AUTO_ORDER
+        return (known,) + tuple(m for m in _AUTO_ORDER if m != known)
+
+    def deploy(self, src, dst):
+        """Despliega src en dst (sustituyéndolo si existe); devuelve el método usado."""
+        src_dev = os.stat(src).st_dev
+        target_dir = os.path.dirname(os.path.abspath(dst))
+        same_volume = os.stat(target_dir).st_dev == src_dev
+        key = (src_dev, target_dir)
+        tmp = f"{dst}.deploying"
+        error = None
+        for method in self._candidates(key):
+            if method in ('hardlink', 'reflink') and not same_volume:
+                continue  # Ni los enlaces duros ni los clones cruzan volúmenes
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            try:
+                _METHODS[method](src, tmp)
+                os.replace(tmp, dst)
+                if os.path.lexists(tmp):
+                    # rename() no hace nada si tmp y dst ya eran el mismo archivo (enlace duro)
+                    os.remove(tmp)
+            except OSError as e:
+                error = e
+                continue
+            self._pair_method[key] = method
+            self.counts[method] = self.counts.get(method, 0) + 1
+            return method
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        raise error or OSError(f"No se pudo desplegar {src}")
+
+    def summary(self):
+        return ", ".join(f"{n} {method}" for method, n in sorted(self.counts.items())) or "nada"
@@ -0,0 +1,114 @@
+import time
+import itertools
+import threading
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    """Token bucket compartido para limitar los bytes/s de todas las descargas.
+
+    Con max_bytes_per_sec = 0 (o None) no se limita nada.
+    """
+
+    def __init__(self, max_bytes_per_sec=0):
+        self.max_bytes_per_sec = max_bytes_per_sec or 0
+        self._lock = threading.Lock()
+        self._tokens = float(self.max_bytes_per_sec)
+        self._last = time.monotonic()
+
+    def consume(self, nbytes):
+        if not self.max_bytes_per_sec:
+            return
+        with self._lock:
+            now = time.monotonic()
+            rate = self.max_bytes_per_sec
+            # Ráfaga máxima de un segundo de ancho de banda
+            self._tokens = min(rate, self._tokens + (now - self._last) * rate)
+            self._last = now
+            self._tokens -= nbytes
+            wait = -self._tokens / rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class DownloadJob:
+    def __init__(self, fn, host, priority):
+        self.fn = fn
+        self.host = host
+        self.priority = priority
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self):
+        self._done.wait()
+        return self.result
+
+
+class DownloadScheduler:
+    """Cola de descargas con prioridad, límite global y límite por host.
+
+    Los trabajos con menor valor de priority salen antes; entre los de igual
+    prioridad se respeta el orden de llegada. Un trabajo sólo arranca si su host
+    tiene huecos libres (per_host_limit), así un CDN lento no acapara todos los
+    hilos. El RateLimiter (limiter) lo usa quien escribe los bytes descargados.
+    """
+
+    def __init__(self, max_concurrency=6, per_host_limit=3, max_bytes_per_sec=0):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.limiter = RateLimiter(max_bytes_per_sec)
+        self._cond = threading.Condition()
+        self._pending = []  # (priority, seq, job)
+        self._seq = itertools.count()
+        self._active = {}
+        self._closed = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.max_concurrency)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn, url, priority=0):
+        """Encola fn() para descargar url; devuelve un DownloadJob."""
+        job = DownloadJob(fn, urlsplit(url).netloc, priority)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("DownloadScheduler cerrado")
+            self._pending.append((priority, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def _take(self):
+        with self._cond:
+            while True:
+                runnable = [e for e in self._pending if self._active.get(e[2].host, 0) < self.per_host_limit]
+                if runnable:
+                    entry = min(runnable)
+                    self._pending.remove(entry)
+                    job = entry[2]
+                    self._active[job.host] = self._active.get(job.host, 0) + 1
+                    return job
+                if self._closed and not self._pending:
+                    return None
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            try:
+                job.result = job.fn()
+            except Exception as e:
+                job.error = e
+            finally:
+                with self._cond:
+                    self._active[job.host] -= 1
+                    # Puede haber trabajos esperando a este host
+                    self._cond.notify_all()
+                job._done.set()
+
+    def close(self):
+        """Termina los hilos cuando se vacíe la cola."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
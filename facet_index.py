@@ -0,0 +1,160 @@
+from collections import defaultdict
+
+# Facetas de la galería: atributo de LoraEntry que se agrupa (tags es una lista)
+FACETS = ('base_model', 'model_type', 'nsfw', 'creator', 'tags')
+
+
+class FacetIndex:
+    """Pertenencia precalculada de cada documento a los valores de cada faceta.
+
+    Cada documento (una ruta) ocupa un bit fijo y cada valor de faceta
+    guarda un bitmap (un int de Python) con los bits de sus documentos. Una
+    combinación de filtros es un AND de bitmaps y el número de documentos de
+    un valor un bit_count(), así que ni filtrar ni contar recorre las
+    entradas. Los bits de los documentos eliminados se reutilizan.
+    """
+
+    def __init__(self, facets=FACETS):
+        self.facets = facets
+        self._slot_of = {}  # clave -> bit
+        self._keys = []  # bit -> clave (None si está libre)
+        self._free = []  # bits libres
+        self._values = {}  # clave -> {faceta: valores}
+        self._bitmaps = {facet: {} for facet in facets}  # faceta -> valor -> bitmap
+        self.all = 0  # bitmap de todos los documentos
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def _assign(self, key, values):
+        """Reserva un bit para key y guarda sus valores; devuelve (bit, valores por faceta)."""
+        if key in self._slot_of:
+            self.remove(key)
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+        self._slot_of[key] = slot
+        stored = {}
+        for facet in self.facets:
+            value = values.get(facet)
+            if value is None or value == "":
+                stored[facet] = ()
+            elif isinstance(value, (list, tuple)):
+                stored[facet] = tuple(v for v in value if v is not None and v != "")
+            else:
+                stored[facet] = (value,)
+        self._values[key] = stored
+        return slot, stored
+
+    def add(self, key, values):
+        """Añade o sustituye un documento; values es {faceta: valor o lista de valores}."""
+        slot, stored = self._assign(key, values)
+        bit = 1 << slot
+        self.all |= bit
+        for facet, facet_values in stored.items():
+            bitmaps = self._bitmaps[facet]
+            for v in facet_values:
+                bitmaps[v] = bitmaps.get(v, 0) | bit
+
+    def add_many(self, items):
+        """Añade muchos documentos ((clave, values), ...) de una vez.
+
+        Hacer un OR por documento sobre bitmaps grandes copia el bitmap
+        entero cada vez; aquí se juntan los bits de cada valor en un
+        bytearray y se hace un solo OR por valor.
+        """
+        slots = {facet: defaultdict(list) for facet in self.facets}
+        new = []
+        assign = self._assign
+        for key, values in items:
+            slot, stored = assign(key, values)
+            new.append(slot)
+            for facet, facet_values in stored.items():
+                if facet_values:
+                    facet_slots = slots[facet]
+                    for v in facet_values:
+                        facet_slots[v].append(slot)
+        self.all |= self._from_slots(new)
+        for facet, facet_slots in slots.items():
+            bitmaps = self._bitmaps[facet]
+            for v, value_slots in facet_slots.items():
+                bitmaps[v] = bitmaps.get(v, 0) | self._from_slots(value_slots)
+
+    def _from_slots(self, slots):
+        bits = bytearray((len(self._keys) + 7) // 8)
+        for slot in slots:
+            bits[slot >> 3] |= 1 << (slot & 7)
+        return int.from_bytes(bits, 'little')
+
+    def remove(self, key):
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        self.all &= mask
+        for facet, facet_values in self._values.pop(key).items():
+            bitmaps = self._bitmaps[facet]
+            for v in facet_values:
+                bitmap = bitmaps[v] & mask
+                if bitmap:
+                    bitmaps[v] = bitmap
+                else:
+                    del bitmaps[v]
+        self._keys[slot] = None
+        self._free.append(slot)
+
+    def clear(self):
+        self._slot_of.clear()
+        self._keys.clear()
+        self._free.clear()
+        self._values.clear()
+        for bitmaps in self._bitmaps.values():
+            bitmaps.clear()
+        self.all = 0
+
+    def values(self, facet):
+        """Valores presentes en la faceta."""
+        return list(self._bitmaps[facet])
+
+    def bitmap(self, keys):
+        """Bitmap de un conjunto de claves (las desconocidas se ignoran)."""
+        slot_of = self._slot_of
+        return self._from_slots(slot_of[key] for key in keys if key in slot_of)
+
+    def keys(self, bitmap):
+        """Claves de los bits activos de un bitmap."""
+        keys = self._keys
+        bits = bin(bitmap)[:1:-1]  # bit 0 primero
+        result = []
+        i = bits.find('1')
+        while i >= 0:
+            result.append(keys[i])
+            i = bits.find('1', i + 1)
+        return result
+
+    def select(self, selection, base=None, skip=None):
+        """Bitmap de los documentos de base que cumplen todos los filtros.
+
+        selection es {faceta: valor}; skip es una faceta cuyo filtro se ignora
+        (para contar los valores de esa faceta con el resto de filtros).
+        """
+        result = self.all if base is None else base & self.all
+        for facet, value in selection.items():
+            if facet != skip:
+                result &= self._bitmaps[facet].get(value, 0)
+        return result
+
+    def counts(self, facet, selection, base=None):
+        """Número de documentos de cada valor de facet con los demás filtros aplicados."""
+        scope = self.select(selection, base, skip=facet)
+        return {value: (bitmap & scope).bit_count() for value, bitmap in self._bitmaps[facet].items()}
+
+    def matches(self, key, selection):
+        """Indica si un documento cumple todos los filtros de selection."""
+        stored = self._values.get(key)
+        if stored is None:
+            return False
+        return all(value in stored[facet] for facet, value in selection.items())
@@ -0,0 +1,577 @@
+import os
+import bisect
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap, QColor, QPen, QFont, QPainter
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QListView, QAbstractItemView
+
+from thumbnail_loader import PRIORITY_VISIBLE
+
+EntryRole = Qt.ItemDataRole.UserRole + 1
+SelectedRole = Qt.ItemDataRole.UserRole + 2
+
+CARD_PADDING = 10
+NAME_HEIGHT = 26
+FOLDER_HEIGHT = 20
+
+
+def _missing_runs(short, long, max_runs=64):
+    """Tramos [inicio, fin] de posiciones de long que no están en short.
+
+    Devuelve None si short no es una subsecuencia de long o si hay más de
+    max_runs tramos (entonces sale más barato resetear el modelo).
+    """
+    runs = []
+    j = 0
+    for pos, value in enumerate(long):
+        if j < len(short) and short[j] == value:
+            j += 1
+        elif runs and runs[-1][1] == pos - 1:
+            runs[-1][1] = pos
+        else:
+            if len(runs) == max_runs:
+                return None
+            runs.append([pos, pos])
+    return runs if j == len(short) else None
+
+
+class LoraEntry:
+    """Datos de un LORA en la galería (sin widgets)."""
+
+    __slots__ = ('path', 'name', 'folder', 'preview_path', 'config_path', 'base_model', 'has_json', 'trained_words',
+                 'model_type', 'nsfw', 'creator', 'tags')
+
+    def __init__(self, path, name, folder, preview_path, config_path=None, base_model=None, has_json=False,
+                 trained_words=(), model_type=None, nsfw=None, creator=None, tags=()):
+        self.path = path
+        self.name = name
+        self.folder = folder  # Ruta relativa a lora_path ("." en la raíz)
+        self.preview_path = preview_path
+        self.config_path = config_path
+        self.base_model = base_model
+        self.has_json = has_json
+        self.trained_words = tuple(trained_words)
+        self.model_type = model_type
+        self.nsfw = nsfw
+        self.creator = creator
+        self.tags = tuple(tags)
+
+    def same_as(self, other):
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    def sort_key(self):
+        return (self.folder, self.name)
+
+    def facet_values(self):
+        """Valores de cada faceta de facet_index.FACETS."""
+        return {'base_model': self.base_model, 'model_type': self.model_type, 'nsfw': self.nsfw,
+                'creator': self.creator, 'tags': self.tags}
+
+
+class GalleryModel(QAbstractListModel):
+    """Modelo de lista de la galería: todas las entradas y el subconjunto visible.
+
+    Las miniaturas se piden al ThumbnailLoader sólo cuando la vista pinta una
+    fila (es decir, cuando está en pantalla) y se guardan en una LRU de tamaño
+    fijo, así la memoria no crece con el tamaño de la biblioteca. Al cambiar
+    el zoom se siguen pintando las ya decodificadas (el delegate las escala) y
+    sólo se vuelven a pedir las que se han quedado pequeñas.
+
+    Si se pasa un SearchIndex o un FacetIndex se mantienen sincronizados con
+    las entradas (clave = ruta) para que la búsqueda y los filtros no tengan
+    que recorrerlas.
+    """
+
+    def __init__(self, loader, thumbnail_size, key_prefix="", priority=PRIORITY_VISIBLE,
+                 is_selected=None, max_pixmaps=600, search_index=None, facet_index=None, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.thumbnail_size = thumbnail_size
+        self.key_prefix = key_prefix
+        self.priority = priority
+        self.is_selected = is_selected or (lambda path: False)
+        self.max_pixmaps = max_pixmaps
+        self.search_index = search_index
+        self.facet_index = facet_index
+        self._entries = []
+        self._rows = []  # índices de _entries visibles, en orden
+        self._row_of = {}  # ruta -> fila visible (None = por reconstruir)
+        self._index_of = {}  # ruta -> índice en _entries
+        self._ranks = []  # posición de cada entrada en el orden (carpeta, nombre) (None = por calcular)
+        self._pixmaps = OrderedDict()  # ruta -> (QPixmap, tamaño pedido) (LRU)
+        self._requested = {}  # ruta -> tamaño pedido al loader
+        self._failed = set()  # rutas cuyo preview no se pudo decodificar
+        self.loader.loaded.connect(self._on_thumbnail_loaded)
+
+    # --- Datos ---
+    def set_entries(self, entries):
+        self.cancel_thumbnails()
+        self.beginResetModel()
+        self._entries = list(entries)
+        self._rows = list(range(len(self._entries)))
+        self._reindex()
+        if self.search_index is not None:
+            self.search_index.clear()
+            for entry in self._entries:
+                self.search_index.add(entry.path, entry.name, entry.trained_words,
+                                      "" if entry.folder == "." else entry.folder)
+        if self.facet_index is not None:
+            self.facet_index.clear()
+            self.facet_index.add_many((entry.path, entry.facet_values()) for entry in self._entries)
+        self._pixmaps.clear()
+        self._failed.clear()
+        self.endResetModel()
+
+    def entries(self):
+        return self._entries
+
+    def _index_entry(self, entry):
+        if self.search_index is not None:
+            self.search_index.add(entry.path, entry.name, entry.trained_words,
+                                  "" if entry.folder == "." else entry.folder)
+        if self.facet_index is not None:
+            self.facet_index.add(entry.path, entry.facet_values())
+
+    def set_visible_rows(self, indices):
+        """Muestra sólo las entradas indicadas (índices de entries(), en ese orden).
+
+        Si la lista nueva sólo quita o sólo añade filas respecto a la actual
+        (lo normal al escribir o borrar letras en la búsqueda) se emiten
+        eliminaciones o inserciones por tramos en vez de resetear el modelo.
+        """
+        indices = list(indices)
+        if indices == self._rows:
+            return
+        if len(indices) < len(self._rows):
+            runs = _missing_runs(indices, self._rows)
+            if runs is not None:
+                for start, end in reversed(runs):
+                    self.beginRemoveRows(QModelIndex(), start, end)
+                    del self._rows[start:end + 1]
+                    self.endRemoveRows()
+                self._row_of = None
+                return
+        else:
+            runs = _missing_runs(self._rows, indices)
+            if runs is not None:
+                for start, end in runs:
+                    self.beginInsertRows(QModelIndex(), start, end)
+                    self._rows[start:start] = indices[start:end + 1]
+                    self.endInsertRows()
+                self._row_of = None
+                return
+        self.beginResetModel()
+        self._rows = indices
+        self._row_of = None
+        self.endResetModel()
+
+    def _reindex(self):
+        self._index_of = {entry.path: i for i, entry in enumerate(self._entries)}
+        self._row_of = None
+        self._ranks = None
+
+    def sort_ranks(self):
+        """Posición de cada entrada de entries() en el orden (carpeta, nombre).
+
+        Ordenar filas por estos enteros es mucho más barato que comparar
+        carpetas y nombres; se recalcula sólo tras añadir o quitar entradas.
+        """
+        if self._ranks is None:
+            entries = self._entries
+            ranks = [0] * len(entries)
+            for rank, i in enumerate(sorted(range(len(entries)), key=lambda i: entries[i].sort_key())):
+                ranks[i] = rank
+            self._ranks = ranks
+        return self._ranks
+
+    def has_path(self, path):
+        return path in self._index_of
+
+    def index_of(self, path):
+        """Índice de la entrada en entries() (o None)."""
+        return self._index_of.get(path)
+
+    def upsert_entry(self, entry, visible=True):
+        """Añade o actualiza una entrada sin resetear el modelo (cambios en vivo)."""
+        self.upsert_entries([entry], visible)
+
+    def upsert_entries(self, entries, visible=True):
+        """Añade o actualiza varias entradas de una vez sin resetear el modelo.
+
+        visible puede ser una función de la entrada; se llama después de
+        actualizar los índices de búsqueda y facetas de todas. Las entradas
+        nuevas van al final de entries().
+        """
+        entries = list(entries)
+        for entry in entries:
+            i = self._index_of.get(entry.path)
+            if i is None:
+                self._index_of[entry.path] = len(self._entries)
+                self._entries.append(entry)
+                self._ranks = None
+            else:
+                if self._entries[i].sort_key() != entry.sort_key():
+                    self._ranks = None
+                self._entries[i] = entry
+                self._forget_thumbnail(entry.path)
+            self._index_entry(entry)
+        if len(entries) > 1:
+            self._row_lookup()
+        show, hide = [], []
+        for entry in entries:
+            shown = visible(entry) if callable(visible) else visible
+            row = self._row(entry.path)
+            if row is not None and shown:
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx)
+            elif row is not None:
+                hide.append(row)
+            elif shown:
+                show.append(self._index_of[entry.path])
+        self._remove_rows(hide)
+        self._insert_rows(show)
+
+    def remove_path(self, path):
+        self.remove_paths([path])
+
+    def remove_paths(self, paths):
+        """Quita varias entradas; el hueco de cada una lo ocupa la última de entries()."""
+        gone = [path for path in dict.fromkeys(paths) if path in self._index_of]
+        if not gone:
+            return
+        if len(gone) > 1:
+            self._row_lookup()
+        self._remove_rows([row for row in map(self._row, gone) if row is not None])
+        if len(gone) > 1:
+            self._row_lookup()
+        self._ranks = None
+        for path in gone:
+            i = self._index_of.pop(path)
+            last = self._entries.pop()
+            if last.path != path:
+                row = self._row(last.path)
+                self._entries[i] = last
+                self._index_of[last.path] = i
+                if row is not None:
+                    self._rows[row] = i
+            self._forget_thumbnail(path)
+            for index in (self.search_index, self.facet_index):
+                if index is not None:
+                    index.remove(path)
+
+    def _remove_rows(self, rows):
+        """Quita filas visibles con una eliminación por tramo de filas contiguas."""
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        runs = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        for start, end in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self._rows[start:end + 1]
+            self._row_of = None
+            self.endRemoveRows()
+
+    def _insert_rows(self, indices):
+        """Inserta entradas en las filas visibles manteniendo el orden (carpeta, nombre)."""
+        sort_key = lambda i: self._entries[i].sort_key()
+        for i in sorted(set(indices), key=sort_key):
+            row = bisect.bisect(self._rows, sort_key(i), key=sort_key)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.insert(row, i)
+            self._row_of = None
+            self.endInsertRows()
+
+    def _row_lookup(self):
+        """Tabla ruta -> fila visible; se reconstruye sólo cuando se pide tras un cambio de filas."""
+        if self._row_of is None:
+            self._row_of = {self._entries[i].path: row for row, i in enumerate(self._rows)}
+        return self._row_of
+
+    def _row(self, path):
+        """Fila visible de path (o None).
+
+        Con la tabla caducada se busca en _rows sin reconstruirla, que para
+        una sola ruta es mucho más barato que recorrer todas las entradas.
+        """
+        if self._row_of is not None:
+            return self._row_of.get(path)
+        i = self._index_of.get(path)
+        if i is None:
+            return None
+        try:
+            return self._rows.index(i)
+        except ValueError:
+            return None
+
+    def sync_entries(self, entries):
+        """Aplica sólo las diferencias respecto a la lista actual de entradas."""
+        new = {entry.path: entry for entry in entries}
+        self.remove_paths([e.path for e in self._entries if e.path not in new])
+        changed = []
+        for entry in entries:
+            i = self._index_of.get(entry.path)
+            if i is None or not self._entries[i].same_as(entry):
+                changed.append(entry)
+        if changed:
+            self.upsert_entries(changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def entry(self, row):
+        return self._entries[self._rows[row]]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        entry = self.entry(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return entry.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return entry.path
+        if role == EntryRole:
+            return entry
+        if role == SelectedRole:
+            return self.is_selected(entry.path)
+        return None
+
+    def refresh_path(self, path):
+        row = self._row_lookup().get(path)
+        if row is not None:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+
+    def refresh_all(self):
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1))
+
+    # --- Miniaturas ---
+    def _key(self, entry):
+        return self.key_prefix + entry.path
+
+    def thumbnail(self, entry):
+        """QPixmap de la miniatura o None si aún no está (y entonces se pide).
+
+        Si la que hay se decodificó para un tamaño menor que el actual se
+        devuelve igualmente y se pide otra a la resolución nueva.
+        """
+        cached = self._pixmaps.get(entry.path)
+        if cached is not None:
+            self._pixmaps.move_to_end(entry.path)
+            pixmap, size = cached
+            if size < self.thumbnail_size and entry.path not in self._requested and entry.path not in self._failed:
+                self._request(entry)
+            return pixmap
+        if entry.path in self._requested or entry.path in self._failed:
+            return None
+        if entry.preview_path and os.path.exists(entry.preview_path):
+            self._request(entry)
+        else:
+            self._failed.add(entry.path)
+        return None
+
+    def _request(self, entry):
+        self._requested[entry.path] = self.thumbnail_size
+        self.loader.request(self._key(entry), entry.preview_path, self.thumbnail_size, self.priority)
+
+    def set_thumbnail_size(self, size):
+        """Cambia el tamaño sin descartar las miniaturas ya decodificadas."""
+        self.thumbnail_size = size
+        self.cancel_thumbnails()
+        self.refresh_all()
+
+    def _forget_thumbnail(self, path):
+        # El preview pudo cambiar: volver a pedirlo en el próximo pintado
+        self._pixmaps.pop(path, None)
+        self._failed.discard(path)
+        if self._requested.pop(path, None) is not None:
+            self.loader.cancel(self.key_prefix + path)
+
+    def cancel_thumbnails(self, keep_paths=()):
+        """Cancela las miniaturas pedidas y aún no recibidas, salvo las de keep_paths."""
+        for path in [p for p in self._requested if p not in keep_paths]:
+            del self._requested[path]
+            self.loader.cancel(self.key_prefix + path)
+
+    def cancel_hidden_thumbnails(self, view):
+        """Cancela las miniaturas pendientes de filas filtradas o fuera de la vista."""
+        viewport_rect = view.viewport().rect()
+        keep = set()
+        row_of = self._row_lookup()
+        for path in self._requested:
+            row = row_of.get(path)
+            if row is not None and view.visualRect(self.index(row)).intersects(viewport_rect):
+                keep.add(path)
+        self.cancel_thumbnails(keep)
+
+    def _on_thumbnail_loaded(self, key, image):
+        path = key[len(self.key_prefix):]
+        if not key.startswith(self.key_prefix) or path not in self._requested:
+            return
+        size = self._requested.pop(path)
+        if image.isNull():
+            self._failed.add(path)
+            return
+        self._pixmaps[path] = (QPixmap.fromImage(image), size)
+        self._pixmaps.move_to_end(path)
+        while len(self._pixmaps) > self.max_pixmaps:
+            self._pixmaps.popitem(last=False)
+        self.refresh_path(path)
+
+
+class GalleryDelegate(QStyledItemDelegate):
+    """Pinta cada LORA como una tarjeta (nombre, carpeta y miniatura).
+
+    Sustituye al árbol de QWidget por LORA: sólo se pinta lo que está en
+    pantalla. Un click en el nombre pide la info (si show_info), en el resto
+    de la tarjeta alterna la selección.
+    """
+
+    toggled = pyqtSignal(str)
+    info_requested = pyqtSignal(str)
+
+    def __init__(self, thumbnail_size, spacing=20, show_folder=True, show_info=True, parent=None):
+        super().__init__(parent)
+        self.thumbnail_size = thumbnail_size
+        self.spacing = spacing
+        self.show_folder = show_folder
+        self.show_info = show_info
+        self._name_font = QFont()
+        self._name_font.setBold(True)
+        self._name_font.setPixelSize(13)
+        self._folder_font = QFont()
+        self._folder_font.setPixelSize(11)
+
+    def card_rect(self, rect):
+        return QRect(rect.x() + self.spacing // 2, rect.y() + self.spacing // 2, self.thumbnail_size, self.thumbnail_size)
+
+    def name_rect(self, rect):
+        card = self.card_rect(rect)
+        return QRect(card.x() + CARD_PADDING, card.y() + CARD_PADDING, card.width() - 2 * CARD_PADDING, NAME_HEIGHT)
+
+    def sizeHint(self, option, index):
+        return QSize(self.thumbnail_size + self.spacing, self.thumbnail_size + self.spacing)
+
+    def paint(self, painter, option, index):
+        entry = index.data(EntryRole)
+        if entry is None:
+            return
+        selected = bool(index.data(SelectedRole))
+        hover = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        card = self.card_rect(option.rect)
+        if selected:
+            background = QColor("#2e7d32") if hover else QColor("#1b5e20")
+            border = QColor("#2e7d32")
+        else:
+            background = QColor("#353535") if hover else QColor("#2d2d2d")
+            border = QColor("#3d3d3d")
+        painter.setPen(QPen(border, 1))
+        painter.setBrush(background)
+        painter.drawRoundedRect(card.adjusted(0, 0, -1, -1), 5, 5)
+        # Nombre (azul si tiene .json de Civitai)
+        name_rect = self.name_rect(option.rect)
+        painter.setFont(self._name_font)
+        painter.setPen(QColor("#2196f3") if entry.has_json else QColor("#ffffff"))
+        name = painter.fontMetrics().elidedText(entry.name, Qt.TextElideMode.ElideRight, name_rect.width())
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignCenter, name)
+        top = name_rect.bottom() + 5
+        # Carpeta relativa
+        if self.show_folder and entry.folder != ".":
+            painter.setFont(self._folder_font)
+            folder_rect = QRect(card.x() + CARD_PADDING + 5, top, card.width() - 2 * CARD_PADDING - 10, FOLDER_HEIGHT)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#444857"))
+            painter.drawRoundedRect(folder_rect, 3, 3)
+            painter.setPen(QColor("#ffffff"))
+            folder = painter.fontMetrics().elidedText(entry.folder, Qt.TextElideMode.ElideMiddle, folder_rect.width() - 4)
+            painter.drawText(folder_rect, Qt.AlignmentFlag.AlignCenter, folder)
+            top = folder_rect.bottom() + 5
+        # Miniatura (placeholder gris mientras se decodifica)
+        image_rect = QRect(card.x() + CARD_PADDING, top, card.width() - 2 * CARD_PADDING, card.bottom() - CARD_PADDING - top)
+        if image_rect.height() > 0:
+            pixmap = index.model().thumbnail(entry)
+            if pixmap is None:
+                painter.fillRect(image_rect, QColor(200, 200, 200))
+            else:
+                size = pixmap.size().scaled(image_rect.size(), Qt.AspectRatioMode.KeepAspectRatio)
+                target = QRect(0, 0, size.width(), size.height())
+                target.moveCenter(image_rect.center())
+                painter.drawPixmap(target, pixmap)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonPress and event.button() == Qt.MouseButton.LeftButton:
+            entry = index.data(EntryRole)
+            if entry is None:
+                return False
+            if not self.card_rect(option.rect).contains(event.position().toPoint()):
+                return False
+            if self.show_info and self.name_rect(option.rect).contains(event.position().toPoint()):
+                self.info_requested.emit(entry.path)
+            else:
+                self.toggled.emit(entry.path)
+            return True
+        return False
+
+
+class GalleryView(QListView):
+    """QListView que recoloca los elementos existentes al redimensionar.
+
+    No relee nada: sólo recalcula la rejilla, y lo hace una vez terminado el
+    arrastre (debounce) y por lotes para no bloquear con bibliotecas grandes.
+    """
+
+    def __init__(self, parent=None, reflow_delay=80):
+        super().__init__(parent)
+        self._reflow_timer = QTimer(self)
+        self._reflow_timer.setSingleShot(True)
+        self._reflow_timer.setInterval(reflow_delay)
+        self._reflow_timer.timeout.connect(self.scheduleDelayedItemsLayout)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Sin wrapping (panel de aplicados) el ancho no cambia la disposición
+        if self.isWrapping() and event.oldSize().width() != event.size().width():
+            self._reflow_timer.start()
+
+
+def create_gallery_view(model, delegate, horizontal=False):
+    """QListView en modo icono configurado para la galería (o el panel de aplicados)."""
+    view = GalleryView()
+    view.setModel(model)
+    view.setItemDelegate(delegate)
+    view.setViewMode(QListView.ViewMode.IconMode)
+    view.setMovement(QListView.Movement.Static)
+    # Fixed: la recolocación la hace GalleryView con debounce
+    view.setResizeMode(QListView.ResizeMode.Fixed)
+    view.setLayoutMode(QListView.LayoutMode.Batched)
+    view.setBatchSize(500)
+    view.setUniformItemSizes(True)
+    view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+    view.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+    view.setMouseTracking(True)
+    view.setStyleSheet("QListView { background-color: transparent; border: none; }")
+    if horizontal:
+        view.setFlow(QListView.Flow.LeftToRight)
+        view.setWrapping(False)
+        view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+    else:
+        view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+    set_gallery_item_size(view, delegate, delegate.thumbnail_size)
+    return view
+
+
+def set_gallery_item_size(view, delegate, thumbnail_size):
+    delegate.thumbnail_size = thumbnail_size
+    view.setGridSize(QSize(thumbnail_size + delegate.spacing, thumbnail_size + delegate.spacing))
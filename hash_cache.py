@@ -0,0 +1,109 @@
+import os
+
+from persistence import APP_DIR, JsonStore, read_json
+
+HASH_CACHE_PATH = os.path.join(APP_DIR, "hash_cache.json")
+
+
+class HashCache(JsonStore):
+    """Caché persistente de hashes SHA256 indexada por ruta.
+
+    Cada entrada guarda el tamaño, mtime (ns) e inodo del archivo en el momento
+    de calcular el hash; si alguno cambia la entrada se considera inválida y el
+    archivo se vuelve a hashear. Junto a los hashes finales se guardan los
+    checkpoints de hashes a medias de archivos grandes (ver
+    hashing.sha256_file_resumable). Es segura para usar desde varios hilos.
+    """
+
+    def __init__(self, cache_path=None, autosave_every=50):
+        super().__init__(cache_path or HASH_CACHE_PATH, autosave_every)
+        self._entries = {}
+        self._partials = {}
+        self._seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @staticmethod
+    def _stat_key(st):
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def load(self):
+        data = read_json(self.cache_path)
+        self._entries = data.get('entries', {})
+        self._partials = data.get('partials', {})
+
+    def get(self, path, st=None):
+        """Devuelve el hash guardado si el archivo no ha cambiado, o None."""
+        path = os.path.abspath(path)
+        if st is None:
+            st = os.stat(path)
+        key = self._stat_key(st)
+        with self._lock:
+            self._seen.add(path)
+            entry = self._entries.get(path)
+            if entry and entry.get('key') == key:
+                self.hits += 1
+                return entry.get('sha256')
+            if entry:
+                # El archivo ha cambiado: invalidar la entrada
+                del self._entries[path]
+            self.misses += 1
+            return None
+
+    def put(self, path, file_hash, st=None):
+        path = os.path.abspath(path)
+        if st is None:
+            st = os.stat(path)
+        with self._lock:
+            self._seen.add(path)
+            self._entries[path] = {'key': self._stat_key(st), 'sha256': file_hash}
+            self._partials.pop(path, None)
+            autosave = self._touch()
+        if autosave:
+            # Guardado periódico para no perder horas de hashing si se aborta
+            self.save()
+
+    def get_partial(self, path, st=None):
+        """Devuelve el checkpoint de un hash a medias si el archivo no ha cambiado."""
+        path = os.path.abspath(path)
+        if st is None:
+            st = os.stat(path)
+        with self._lock:
+            partial = self._partials.get(path)
+            if partial and partial.get('key') == self._stat_key(st):
+                return partial.get('checkpoint')
+            self._partials.pop(path, None)
+            return None
+
+    def put_partial(self, path, checkpoint, st=None):
+        """Guarda (y persiste de inmediato) el checkpoint de un hash a medias."""
+        path = os.path.abspath(path)
+        if st is None:
+            st = os.stat(path)
+        with self._lock:
+            self._partials[path] = {'key': self._stat_key(st), 'checkpoint': checkpoint}
+            self._touch()
+        self.save()
+
+    def compact(self):
+        """Elimina las entradas de archivos que ya no existen."""
+        with self._lock:
+            stale = [p for p in self._entries if p not in self._seen and not os.path.exists(p)]
+            for p in stale:
+                del self._entries[p]
+            stale_partials = [p for p in self._partials if p not in self._entries and not os.path.exists(p)]
+            for p in stale_partials:
+                del self._partials[p]
+            stale += stale_partials
+            if stale:
+                self._touch(len(stale))
+        return len(stale)
+
+    def _snapshot(self):
+        return {'version': 1, 'entries': dict(self._entries), 'partials': dict(self._partials)}
+
+    def close(self):
+        """Compacta y guarda la caché; llamar al terminar una sincronización."""
+        self.compact()
+        self.save()
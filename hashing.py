@@ -0,0 +1,247 @@
+import os
+import mmap
+import platform
+import ctypes
+import ctypes.util
+import hashlib
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+HASH_MODES = ("read", "readinto", "mmap")
+# Archivos a partir de este tamaño se hashean con checkpoints reanudables
+RESUMABLE_MIN_SIZE = 1024 * 1024 * 1024
+CHECKPOINT_EVERY = 256 * 1024 * 1024
+
+
+class HashAborted(Exception):
+    """El cálculo del hash se ha cancelado a mitad de archivo."""
+
+
+def _fadvise(fd, offset, length, advice_name):
+    """posix_fadvise si la plataforma lo soporta (Linux); en otro caso no hace nada."""
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+def _check_cancel(cancel_check):
+    if cancel_check is not None and cancel_check():
+        raise HashAborted()
+
+
+def _hash_read(f, sha256, chunk_size, cancel_check=None):
+    # Implementación original: un objeto bytes nuevo por cada bloque
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        _check_cancel(cancel_check)
+        sha256.update(chunk)
+
+
+def _hash_readinto(f, sha256, chunk_size, drop_cache, cancel_check=None):
+    fd = f.fileno()
+    _fadvise(fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    offset = 0
+    while True:
+        _check_cancel(cancel_check)
+        n = f.readinto(buf)
+        if not n:
+            break
+        sha256.update(view[:n])
+        if drop_cache:
+            # Liberar del page cache lo ya leído: el archivo se lee una sola vez
+            _fadvise(fd, offset, n, "POSIX_FADV_DONTNEED")
+        offset += n
+
+
+def _hash_mmap(f, sha256, chunk_size, drop_cache, cancel_check=None):
+    fd = f.fileno()
+    size = os.fstat(fd).st_size
+    if size == 0:
+        return
+    _fadvise(fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mm)
+        try:
+            # chunk_size múltiplo de página para poder usar madvise por tramos
+            step = max(mmap.PAGESIZE, chunk_size - chunk_size % mmap.PAGESIZE)
+            for offset in range(0, size, step):
+                _check_cancel(cancel_check)
+                n = min(step, size - offset)
+                sha256.update(view[offset:offset + n])
+                if drop_cache:
+                    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+                        mm.madvise(mmap.MADV_DONTNEED, offset, n)
+                    _fadvise(fd, offset, n, "POSIX_FADV_DONTNEED")
+        finally:
+            view.release()
+
+
+def sha256_file(file_path, chunk_size=DEFAULT_CHUNK_SIZE, mode="readinto", drop_cache=True, cancel_check=None):
+    """Calcula el SHA256 de un archivo.
+
+    mode:
+      - "read": lectura clásica con f.read (un bytes nuevo por bloque).
+      - "readinto": lectura en un buffer reutilizado, sin copias extra.
+      - "mmap": el archivo se mapea en memoria y se pasa a hashlib por tramos.
+    Con drop_cache=True se avisa al kernel (posix_fadvise) de que el acceso es
+    secuencial y de un solo uso, para no expulsar del page cache otros datos.
+    Si cancel_check() devuelve True entre bloques se lanza HashAborted.
+    """
+    if mode not in HASH_MODES:
+        raise ValueError(f"Modo de hash desconocido: {mode}")
+    sha256 = hashlib.sha256()
+    if mode == "read":
+        with open(file_path, "rb") as f:
+            _hash_read(f, sha256, chunk_size, cancel_check)
+    elif mode == "mmap":
+        with open(file_path, "rb") as f:
+            _hash_mmap(f, sha256, chunk_size, drop_cache, cancel_check)
+    else:
+        with open(file_path, "rb", buffering=0) as f:
+            _hash_readinto(f, sha256, chunk_size, drop_cache, cancel_check)
+    return sha256.hexdigest()
+
+
+def _load_libcrypto():
+    names = [ctypes.util.find_library("crypto"), "libcrypto.so.3", "libcrypto.so.1.1", "libcrypto-3-x64"]
+    for name in names:
+        if not name:
+            continue
+        try:
+            lib = ctypes.CDLL(name)
+            lib.SHA256_Init.argtypes = [ctypes.c_void_p]
+            lib.SHA256_Update.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+            lib.SHA256_Final.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+            lib.OpenSSL_version_num.restype = ctypes.c_ulong
+            return lib
+        except (OSError, AttributeError):
+            continue
+    return None
+
+
+# SHA256_CTX de OpenSSL: h[8], Nl, Nh, data[16], num, md_len (112 bytes)
+_SHA256_CTX_SIZE = 112
+_CTX_GUARD = 64
+
+
+def _self_test(lib):
+    """Comprueba que SHA256_CTX cabe en _SHA256_CTX_SIZE y que un estado copiado se puede reanudar.
+
+    Si la librería usa otra estructura, los checkpoints se desactivan en vez
+    de arriesgar un hash equivocado.
+    """
+    data = bytes(range(256)) * 5
+    ctx = ctypes.create_string_buffer(b"\xa5" * (_SHA256_CTX_SIZE + _CTX_GUARD), _SHA256_CTX_SIZE + _CTX_GUARD)
+    lib.SHA256_Init(ctx)
+    lib.SHA256_Update(ctx, data[:700], 700)
+    if ctx.raw[_SHA256_CTX_SIZE:] != b"\xa5" * _CTX_GUARD:
+        return False
+    resumed = ctypes.create_string_buffer(ctx.raw[:_SHA256_CTX_SIZE], _SHA256_CTX_SIZE)
+    lib.SHA256_Update(resumed, data[700:], len(data) - 700)
+    out = ctypes.create_string_buffer(32)
+    lib.SHA256_Final(out, resumed)
+    return out.raw == hashlib.sha256(data).digest()
+
+
+_libcrypto = _load_libcrypto()
+if _libcrypto is not None and not _self_test(_libcrypto):
+    _libcrypto = None
+RESUMABLE_AVAILABLE = _libcrypto is not None
+# El estado es la estructura interna de una versión concreta de OpenSSL: el
+# formato anota versión y arquitectura y los checkpoints de otra se descartan
+_STATE_FORMAT = (f"openssl-sha256-ctx-{_SHA256_CTX_SIZE}-{_libcrypto.OpenSSL_version_num():x}-{platform.machine()}"
+                 if _libcrypto is not None else None)
+
+
+class _ResumableSHA256:
+    """SHA256 cuyo estado intermedio se puede serializar (hashlib no lo permite).
+
+    Usa SHA256_Init/Update/Final de libcrypto vía ctypes; el estado es la copia
+    en bruto de SHA256_CTX, válida sólo con la misma versión de la librería en
+    la misma arquitectura (lo que anota _STATE_FORMAT).
+    """
+
+    def __init__(self, state=None):
+        if state is not None:
+            if len(state) != _SHA256_CTX_SIZE:
+                raise ValueError("Estado SHA256 con tamaño inesperado")
+            self._ctx = ctypes.create_string_buffer(state, _SHA256_CTX_SIZE)
+        else:
+            self._ctx = ctypes.create_string_buffer(_SHA256_CTX_SIZE)
+            _libcrypto.SHA256_Init(self._ctx)
+
+    def update_buffer(self, cbuf, n):
+        _libcrypto.SHA256_Update(self._ctx, cbuf, n)
+
+    def state(self):
+        return self._ctx.raw
+
+    def hexdigest(self):
+        ctx = ctypes.create_string_buffer(self._ctx.raw, _SHA256_CTX_SIZE)
+        out = ctypes.create_string_buffer(32)
+        _libcrypto.SHA256_Final(out, ctx)
+        return out.raw.hex()
+
+
+def sha256_file_resumable(file_path, checkpoint=None, save_checkpoint=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE, checkpoint_every=CHECKPOINT_EVERY,
+                          drop_cache=True, cancel_check=None):
+    """SHA256 reanudable para archivos muy grandes.
+
+    checkpoint es un dict {'offset', 'state', 'format'} guardado en una ejecución
+    anterior (o None); si su formato no es el de la libcrypto cargada se
+    empieza desde cero. save_checkpoint(dict) se llama cada checkpoint_every bytes
+    y también al cancelar, antes de lanzar HashAborted. Si libcrypto no está
+    disponible se calcula el hash completo sin checkpoints.
+    """
+    if not RESUMABLE_AVAILABLE:
+        return sha256_file(file_path, chunk_size=chunk_size, drop_cache=drop_cache, cancel_check=cancel_check)
+    offset = 0
+    hasher = None
+    if checkpoint and checkpoint.get('format') == _STATE_FORMAT:
+        try:
+            hasher = _ResumableSHA256(bytes.fromhex(checkpoint['state']))
+            offset = int(checkpoint['offset'])
+        except (KeyError, ValueError, TypeError):
+            hasher = None
+            offset = 0
+    if hasher is None:
+        hasher = _ResumableSHA256()
+
+    def make_checkpoint():
+        return {'offset': offset, 'state': hasher.state().hex(), 'format': _STATE_FORMAT}
+
+    # El checkpoint siempre cae en un límite de bloque
+    chunk_size = max(mmap.PAGESIZE, chunk_size)
+    buf = bytearray(chunk_size)
+    cbuf = (ctypes.c_char * chunk_size).from_buffer(buf)
+    last_saved = offset
+    try:
+        with open(file_path, "rb", buffering=0) as f:
+            fd = f.fileno()
+            _fadvise(fd, offset, 0, "POSIX_FADV_SEQUENTIAL")
+            f.seek(offset)
+            while True:
+                if cancel_check is not None and cancel_check():
+                    if save_checkpoint and offset > last_saved:
+                        save_checkpoint(make_checkpoint())
+                    raise HashAborted()
+                n = f.readinto(buf)
+                if not n:
+                    break
+                hasher.update_buffer(cbuf, n)
+                if drop_cache:
+                    _fadvise(fd, offset, n, "POSIX_FADV_DONTNEED")
+                offset += n
+                if save_checkpoint and offset - last_saved >= checkpoint_every:
+                    save_checkpoint(make_checkpoint())
+                    last_saved = offset
+    finally:
+        del cbuf
+    return hasher.hexdigest()
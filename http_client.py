@@ -0,0 +1,134 @@
+import time
+import random
+import threading
+import email.utils
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RETRY_AFTER_STATUS = {429, 503}
+
+
+class HttpClient:
+    """Sesión HTTP compartida con keep-alive, timeouts y reintentos.
+
+    - Un pool de conexiones por host (per_host_limit conexiones como máximo;
+      los hilos que no consiguen conexión esperan en lugar de abrir más).
+    - Timeouts de conexión y de lectura en todas las peticiones.
+    - Reintentos con backoff exponencial y jitter ante errores de red y 5xx;
+      en 429/503 se respeta la cabecera Retry-After.
+    - Latencia y número de reintentos de cada petición (resp.latency,
+      resp.retries) y estadísticas agregadas en stats()/summary().
+    """
+
+    def __init__(self, per_host_limit=8, connect_timeout=10, read_timeout=60,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, log_func=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.log_func = log_func
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=per_host_limit, pool_block=True, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+        self._latency = 0.0
+        self.history = deque(maxlen=500)  # (método, url, status, latencia, reintentos)
+
+    def _log(self, text):
+        if self.log_func:
+            self.log_func(text)
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _retry_after(self, resp):
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _record(self, method, url, status, latency, retries, failed=False):
+        with self._lock:
+            self._requests += 1
+            self._retries += retries
+            self._latency += latency
+            if failed:
+                self._errors += 1
+            self.history.append((method, url, status, latency, retries))
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """Como requests.request pero con timeouts por defecto y reintentos."""
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._record(method, url, None, time.perf_counter() - start, attempt, failed=True)
+                    raise
+                delay = self._backoff(attempt)
+                self._log(f"Error de red con {urlsplit(url).netloc} ({e.__class__.__name__}); reintento en {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if resp.status_code in RETRY_STATUS and attempt < self.max_retries:
+                delay = None
+                if resp.status_code in RETRY_AFTER_STATUS:
+                    delay = self._retry_after(resp)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                delay = min(delay, self.backoff_max)
+                self._log(f"HTTP {resp.status_code} de {urlsplit(url).netloc}; reintento en {delay:.1f}s")
+                resp.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+            latency = time.perf_counter() - start
+            resp.latency = latency
+            resp.retries = attempt
+            self._record(method, url, resp.status_code, latency, attempt)
+            return resp
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'retries': self._retries,
+                'errors': self._errors,
+                'avg_latency': self._latency / self._requests if self._requests else 0.0,
+            }
+
+    def summary(self):
+        st = self.stats()
+        return (f"HTTP: {st['requests']} peticiones, {st['retries']} reintentos, "
+                f"{st['errors']} errores, latencia media {st['avg_latency'] * 1000:.0f} ms")
+
+    def close(self):
+        self.session.close()
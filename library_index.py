@@ -0,0 +1,592 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+from persistence import APP_DIR
+from parallel_walker import ParallelWalker
+from sidecars import group_sidecars, scan_sidecars
+
+LIBRARY_DB_PATH = os.path.join(APP_DIR, "library.db")
+# Un mtime de carpeta más reciente que esto no se da por bueno: la carpeta
+# podría cambiar otra vez dentro del mismo tick de mtime sin que se note
+RACY_MTIME_NS = 2 * 10**9
+# Versión del esquema (PRAGMA user_version); ver _migrate
+SCHEMA_VERSION = 4
+# Columnas añadidas a models después de la primera versión del esquema
+_ADDED_COLUMNS = (('nsfw', 'INTEGER'), ('creator', 'TEXT'), ('tags', 'TEXT'))
+_MODEL_COLUMNS = ('path', 'name', 'folder', 'size', 'mtime_ns', 'preview', 'config', 'json_mtime_ns', 'base_model',
+                  'model_type', 'trained_words', 'sha256', 'nsfw', 'creator', 'tags')
+# Columnas del índice de texto completo sobre los .json de Civitai
+FTS_COLUMNS = ('name', 'description', 'tags', 'creator', 'trained_words', 'prompt', 'negative_prompt', 'resources')
+# Operadores de búsqueda (campo:valor) y columnas de models_fts que consultan
+FTS_FIELDS = {
+    'name': ('name',),
+    'desc': ('description',),
+    'description': ('description',),
+    'tag': ('tags',),
+    'tags': ('tags',),
+    'creator': ('creator',),
+    'word': ('trained_words',),
+    'trigger': ('trained_words',),
+    'prompt': ('prompt',),
+    'negative': ('negative_prompt',),
+    'resource': ('resources',),
+    'text': FTS_COLUMNS,
+}
+
+# id explícito: VACUUM puede renumerar el rowid implícito de las tablas sin
+# INTEGER PRIMARY KEY, y models_fts se enlaza con models por ese número
+_MODELS_TABLE = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    preview TEXT,
+    config TEXT,
+    json_mtime_ns INTEGER,
+    base_model TEXT,
+    model_type TEXT,
+    trained_words TEXT,
+    sha256 TEXT,
+    nsfw INTEGER,
+    creator TEXT,
+    tags TEXT
+);
+"""
+_SCHEMA = _MODELS_TABLE + """
+CREATE INDEX IF NOT EXISTS models_folder ON models(folder);
+CREATE INDEX IF NOT EXISTS models_base_model ON models(base_model);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    subdirs TEXT,
+    stat_count INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5(
+    name, description, tags, creator, trained_words, prompt, negative_prompt, resources,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+-- El rowid de cada fila de models_fts es el id de su modelo; con recursive_triggers
+-- también se borran al sustituir una fila con INSERT OR REPLACE
+CREATE TRIGGER IF NOT EXISTS models_fts_delete AFTER DELETE ON models BEGIN
+    DELETE FROM models_fts WHERE rowid = old.id;
+END;
+-- Catálogo de modelos base con el número de modelos de cada uno, mantenido
+-- por triggers al insertar, sustituir, modificar o borrar filas de models
+CREATE TABLE IF NOT EXISTS base_models (
+    base_model TEXT PRIMARY KEY,
+    refs INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS base_models_insert AFTER INSERT ON models
+WHEN new.base_model IS NOT NULL BEGIN
+    INSERT INTO base_models (base_model, refs) VALUES (new.base_model, 1)
+        ON CONFLICT (base_model) DO UPDATE SET refs = refs + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS base_models_delete AFTER DELETE ON models
+WHEN old.base_model IS NOT NULL BEGIN
+    UPDATE base_models SET refs = refs - 1 WHERE base_model = old.base_model;
+    DELETE FROM base_models WHERE base_model = old.base_model AND refs <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS base_models_update AFTER UPDATE OF base_model ON models
+WHEN old.base_model IS NOT new.base_model BEGIN
+    UPDATE base_models SET refs = refs - 1 WHERE base_model = old.base_model;
+    DELETE FROM base_models WHERE base_model = old.base_model AND refs <= 0;
+    INSERT INTO base_models (base_model, refs) SELECT new.base_model, 1 WHERE new.base_model IS NOT NULL
+        ON CONFLICT (base_model) DO UPDATE SET refs = refs + 1;
+END;
+"""
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def _names(items):
+    """Nombres de una lista de cadenas o de dicts con 'name'."""
+    if not isinstance(items, list):
+        return []
+    return [str(item.get('name', '')) if isinstance(item, dict) else str(item) for item in items]
+
+
+def _creators(data, model):
+    """Usuarios de Civitai que firman la versión o el modelo (sin repetir)."""
+    creators = []
+    for source in (data, model):
+        creator = source.get('creator')
+        if isinstance(creator, dict) and creator.get('username'):
+            creators.append(str(creator['username']))
+    return list(dict.fromkeys(creators))
+
+
+def _metadata_text(data, model, words):
+    """Texto de cada columna de models_fts a partir del .json de Civitai."""
+    creators = _creators(data, model)
+    prompts, negatives, resources = [], [], []
+    for image in data.get('images') or []:
+        if not isinstance(image, dict):
+            continue
+        if image.get('username'):
+            creators.append(str(image['username']))
+        meta = image.get('meta') or {}
+        if not isinstance(meta, dict):
+            continue
+        if meta.get('prompt'):
+            prompts.append(str(meta['prompt']))
+        if meta.get('negativePrompt'):
+            negatives.append(str(meta['negativePrompt']))
+        resources += _names(meta.get('resources'))
+    descriptions = [str(d) for d in (data.get('description'), model.get('description')) if d]
+    return {
+        'name': ' '.join(str(n) for n in (model.get('name'), data.get('name')) if n),
+        'description': _HTML_TAG.sub(' ', '\n'.join(descriptions)),
+        'tags': ', '.join(_names(data.get('tags')) + _names(model.get('tags'))),
+        'creator': ' '.join(dict.fromkeys(creators)),
+        'trained_words': ', '.join(str(w) for w in words),
+        'prompt': '\n'.join(prompts),
+        'negative_prompt': '\n'.join(negatives),
+        'resources': ', '.join(dict.fromkeys(resources)),
+    }
+
+
+def read_metadata(json_path):
+    """Extrae los datos indexados del .json de Civitai.
+
+    Devuelve un dict con base_model, model_type, trained_words, nsfw,
+    creator, tags y text ({columna de models_fts: texto}); si el .json no se
+    puede leer todos los valores están vacíos y text es None.
+    """
+    meta = {'base_model': None, 'model_type': None, 'trained_words': [], 'nsfw': None, 'creator': None,
+            'tags': [], 'text': None}
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return meta
+    if not isinstance(data, dict):
+        return meta
+    model = data.get('model')
+    if not isinstance(model, dict):
+        model = {}
+    words = data.get('trainedWords') or []
+    if not isinstance(words, list):
+        words = [words]
+    nsfw = model.get('nsfw')
+    creators = _creators(data, model)
+    meta.update(
+        base_model=data.get('baseModel'),
+        model_type=model.get('type'),
+        trained_words=list(words),
+        nsfw=None if nsfw is None else bool(nsfw),
+        creator=creators[0] if creators else None,
+        tags=list(dict.fromkeys(_names(data.get('tags')) + _names(model.get('tags')))),
+        text=_metadata_text(data, model, words),
+    )
+    return meta
+
+
+def parse_query(text):
+    """Separa los operadores campo:valor del texto libre de una búsqueda.
+
+    Devuelve (texto libre, términos) con términos una lista de (columnas,
+    valor, es_frase): campo:"varias palabras" es una frase exacta y
+    campo:palabra un prefijo. Los campos desconocidos se tratan como texto.
+    """
+    terms = []
+
+    def take(match):
+        field = match.group(1).lower()
+        if field not in FTS_FIELDS:
+            return match.group(0)
+        phrase = match.group(3) is not None
+        value = (match.group(3) if phrase else match.group(4)).strip()
+        if value:
+            terms.append((FTS_FIELDS[field], value, phrase))
+        return ' '
+    free = re.sub(r'(\w+):("([^"]*)"?|(\S*))', take, text)
+    return free.strip(), terms
+
+
+def fts_expression(terms):
+    """Expresión MATCH de FTS5 (todos los términos a la vez) para los términos de parse_query."""
+    parts = []
+    for columns, value, phrase in terms:
+        if phrase:
+            tokens = ['"' + value.replace('"', '""') + '"']
+        else:
+            # Cada palabra como prefijo, para que funcione mientras se escribe
+            tokens = ['"' + token.replace('"', '""') + '"*' for token in re.findall(r"\w+", value)]
+        if not tokens:
+            continue
+        scope = '{' + ' '.join(columns) + '}'
+        parts.append(f"{scope} : ({' AND '.join(tokens)})")
+    return ' AND '.join(parts)
+
+
+def _subtree_bounds(folder):
+    """Límites [lo, hi) de las carpetas que cuelgan de folder (para usar el índice)."""
+    folder = os.path.abspath(folder).rstrip(os.sep) + os.sep
+    return folder, folder[:-1] + chr(ord(os.sep) + 1)
+
+
+class LibraryIndex:
+    """Índice persistente (SQLite) de los modelos de la biblioteca.
+
+    Guarda por cada .safetensors su carpeta, tamaño, mtime, preview, config y
+    los metadatos del .json de Civitai (baseModel, tipo, trainedWords, nsfw,
+    creador y etiquetas) además del SHA256 si se conoce. La galería, el combo
+    de carpetas y el filtro de modelos base se sirven con consultas; scan()
+    sólo vuelve a leer el .json de los modelos cuyo archivo o .json han
+    cambiado. Es segura entre hilos.
+
+    Además guarda una instantánea de cada carpeta (mtime y subcarpetas): si
+    el mtime de una carpeta no ha cambiado desde el último escaneo no se lista
+    ni se hace stat de sus archivos. El mtime de una carpeta sólo cambia al
+    crear, borrar o renombrar entradas, así que un archivo reescrito en sitio
+    (un .json, un preview o el propio modelo) sólo se detecta con un escaneo
+    con force=True ("Reescanear biblioteca completa") o, mientras la
+    aplicación está abierta, por el vigilante de sidecars de lora_manager,
+    que llama a refresh_file().
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or LIBRARY_DB_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        # Resultado del último scan(): carpetas visitadas, omitidas y stats evitados
+        self.last_scan = {'dirs': 0, 'dirs_skipped': 0, 'stats_avoided': 0, 'errors': 0}
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            # Cada versión añade datos sacados de los .json (v1: models_fts; v2:
+            # nsfw, creador y etiquetas): invalidar el json_mtime_ns (sin perder
+            # has_json ni el SHA256) y las instantáneas para que el próximo
+            # scan() relea los .json
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(models)")}
+            with self._conn:
+                for column, kind in _ADDED_COLUMNS:
+                    if column not in columns:
+                        self._conn.execute(f"ALTER TABLE models ADD COLUMN {column} {kind}")
+                self._conn.execute("UPDATE models SET json_mtime_ns = -1 WHERE json_mtime_ns IS NOT NULL")
+                self._conn.execute("DELETE FROM dirs")
+        if version < 3:
+            # v3: catálogo base_models; a partir de aquí lo mantienen los triggers
+            with self._conn:
+                self._conn.execute("DELETE FROM base_models")
+                self._conn.execute(
+                    "INSERT INTO base_models (base_model, refs) SELECT base_model, COUNT(*) FROM models "
+                    "WHERE base_model IS NOT NULL GROUP BY base_model")
+        if version < 4 and 'id' not in {row['name'] for row in self._conn.execute("PRAGMA table_info(models)")}:
+            self._add_model_ids()
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _add_model_ids(self):
+        """v4: rehace models con id INTEGER PRIMARY KEY conservando el rowid de cada fila.
+
+        El id nuevo es el rowid que ya enlazaba cada fila con models_fts, así
+        que el texto indexado sigue siendo válido. Los triggers se quitan antes
+        de copiar (la copia no debe tocar base_models ni models_fts) y
+        _SCHEMA los vuelve a crear junto con los índices.
+        """
+        columns = ', '.join(_MODEL_COLUMNS)
+        self._conn.execute("BEGIN")
+        try:
+            for trigger in ('models_fts_delete', 'base_models_insert', 'base_models_delete', 'base_models_update'):
+                self._conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            self._conn.execute("ALTER TABLE models RENAME TO models_v3")
+            self._conn.execute("DROP INDEX IF EXISTS models_folder")
+            self._conn.execute("DROP INDEX IF EXISTS models_base_model")
+            self._conn.execute(_MODELS_TABLE)
+            self._conn.execute(f"INSERT INTO models (id, {columns}) SELECT rowid, {columns} FROM models_v3")
+            self._conn.execute("DROP TABLE models_v3")
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+        self._conn.executescript(_SCHEMA)
+
+    def _row_values(self, root, file, groups, old=None, sha256=None):
+        """Fila de un modelo o None si no ha cambiado respecto a old.
+
+        Devuelve (valores de models, texto para models_fts o None).
+        """
+        path = os.path.join(root, file)
+        lora_name = os.path.splitext(file)[0]
+        st = os.stat(path)
+        group = groups[lora_name.lower()]
+        preview_path = group.preview(root)
+        config_path = group.config(root, lora_name)
+        json_path = os.path.join(root, lora_name + ".json")
+        json_mtime_ns = None
+        if lora_name + ".json" in group.configs:
+            try:
+                json_mtime_ns = os.stat(json_path).st_mtime_ns
+            except OSError:
+                pass
+        if (old is not None and sha256 is None and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns
+                and old['preview'] == preview_path and old['config'] == config_path
+                and old['json_mtime_ns'] == json_mtime_ns):
+            return None
+        meta = read_metadata(json_path) if json_mtime_ns is not None else {}
+        if sha256 is None and old is not None and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+            sha256 = old['sha256']
+        return (path, lora_name, root, st.st_size, st.st_mtime_ns, preview_path, config_path, json_mtime_ns,
+                meta.get('base_model'), meta.get('model_type'),
+                json.dumps(meta.get('trained_words', []), ensure_ascii=False), sha256, meta.get('nsfw'),
+                meta.get('creator'), json.dumps(meta.get('tags', []), ensure_ascii=False)), meta.get('text')
+
+    def _upsert(self, rows):
+        for values, text in rows:
+            # REPLACE borra la fila anterior y el trigger su texto en models_fts
+            cur = self._conn.execute(
+                f"INSERT OR REPLACE INTO models ({', '.join(_MODEL_COLUMNS)})"
+                f" VALUES (?{', ?' * (len(_MODEL_COLUMNS) - 1)})", values)
+            if text:
+                self._conn.execute(
+                    f"INSERT INTO models_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?{', ?' * len(FTS_COLUMNS)})",
+                    (cur.lastrowid, *(text[column] for column in FTS_COLUMNS)))
+
+    def _existing(self, folder):
+        rows = self._conn.execute("SELECT * FROM models WHERE folder = ?", (folder,)).fetchall()
+        return {row['path']: row for row in rows}
+
+    def _scan_dir(self, dirpath, files, groups=None):
+        """Sincroniza una carpeta (sin recursión).
+
+        Devuelve (nuevos, actualizados, eliminados, stats) con las rutas de los
+        modelos y el número de stat de archivos que ha hecho.
+        """
+        if groups is None:
+            groups = group_sidecars(files)
+        with self._lock:
+            existing = self._existing(dirpath)
+        added, updated, rows = [], [], []
+        seen = set()
+        n_stats = 0
+        for file in files:
+            if not file.lower().endswith('.safetensors'):
+                continue
+            path = os.path.join(dirpath, file)
+            old = existing.get(path)
+            lora_name = os.path.splitext(file)[0]
+            n_stats += 1 + (lora_name + ".json" in groups[lora_name.lower()].configs)
+            try:
+                values = self._row_values(dirpath, file, groups, old)
+            except OSError:
+                continue
+            seen.add(path)
+            if values is not None:
+                rows.append(values)
+                (added if old is None else updated).append(path)
+        removed = [path for path in existing if path not in seen]
+        if rows or removed:
+            with self._lock, self._conn:
+                self._upsert(rows)
+                self._conn.executemany("DELETE FROM models WHERE path = ?", [(p,) for p in removed])
+        return added, updated, removed, n_stats
+
+    def _snapshots(self, root):
+        lo, hi = _subtree_bounds(root)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (root, lo, hi)).fetchall()
+        return {row['path']: row for row in rows}
+
+    def _save_snapshot(self, folder, st, subdirs, n_stats):
+        mtime_ns = st.st_mtime_ns
+        if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+            mtime_ns = None  # Forzar relectura en el próximo escaneo
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns, subdirs, stat_count) VALUES (?, ?, ?, ?)",
+                               (folder, mtime_ns, json.dumps(subdirs, ensure_ascii=False), n_stats))
+
+    def _forget_snapshots(self, root, keep=None):
+        lo, hi = _subtree_bounds(root)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT path FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (root, lo, hi)).fetchall()
+            gone = [(row['path'],) for row in rows if keep is None or row['path'] not in keep]
+            self._conn.executemany("DELETE FROM dirs WHERE path = ?", gone)
+
+    def _remove_subtree(self, folder, keep_folders=None):
+        """Elimina las filas bajo folder cuya carpeta no esté en keep_folders; devuelve sus rutas."""
+        lo, hi = _subtree_bounds(folder)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT path, folder FROM models WHERE folder = ? OR (folder >= ? AND folder < ?)",
+                (folder, lo, hi)).fetchall()
+            gone = [row['path'] for row in rows if keep_folders is None or row['folder'] not in keep_folders]
+            self._conn.executemany("DELETE FROM models WHERE path = ?", [(p,) for p in gone])
+        return gone
+
+    def scan(self, root, abort_check=None, force=False, workers=8, on_folder=None):
+        """Sincroniza el índice con lo que hay bajo root.
+
+        Devuelve (nuevos, actualizados, eliminados). Las carpetas cuyo mtime
+        coincide con su instantánea se saltan (sólo cuesta un stat de la
+        carpeta) salvo con force=True; el detalle queda en last_scan. Las
+        carpetas se visitan en paralelo con un ParallelWalker de workers hilos
+        y cada una se guarda en su propia transacción para no bloquear a los
+        lectores mucho tiempo. on_folder(cambiados, eliminados) se llama, en
+        el hilo que llama a scan(), por cada carpeta con cambios según se
+        termina de procesar. Si alguna carpeta no se puede visitar (se cuenta
+        en last_scan['errors']) no se poda nada: lo que no se ha visto no se
+        da por eliminado.
+        """
+        root = os.path.abspath(root)
+        n_added = n_updated = n_removed = 0
+        stats = {'dirs': 0, 'dirs_skipped': 0, 'stats_avoided': 0, 'errors': 0}
+        self.last_scan = stats
+        snapshots = {} if force else self._snapshots(root)
+        visited = set()
+        stats_lock = threading.Lock()
+        walker = ParallelWalker(workers)
+
+        def visit(folder):
+            st = os.stat(folder)
+            snap = snapshots.get(folder)
+            if snap is not None and snap['mtime_ns'] == st.st_mtime_ns:
+                # Sin cambios: ni listado ni stat de sus archivos
+                with stats_lock:
+                    visited.add(folder)
+                    stats['dirs'] += 1
+                    stats['dirs_skipped'] += 1
+                    stats['stats_avoided'] += 1 + snap['stat_count']
+                return json.loads(snap['subdirs']), None
+            groups, files, subdirs = scan_sidecars(folder)
+            with stats_lock:
+                visited.add(folder)
+                stats['dirs'] += 1
+            walker.count_files(len(files))
+            added, updated, removed, n_stats = self._scan_dir(folder, files, groups)
+            self._save_snapshot(folder, st, subdirs, n_stats)
+            return subdirs, (added, updated, removed)
+
+        for folder, result in walker.walk(root, visit, abort_check=abort_check):
+            if result is None:
+                continue
+            added, updated, removed = result
+            n_added += len(added)
+            n_updated += len(updated)
+            n_removed += len(removed)
+            if on_folder and (added or updated or removed):
+                on_folder(added + updated, removed)
+        stats['walker'] = walker.summary()
+        stats['errors'] = walker.errors
+        if walker.errors or (abort_check and abort_check()):
+            # Recorrido incompleto: una carpeta que no se pudo visitar (p. ej. un
+            # montaje de red que falla un momento) no significa que haya desaparecido
+            return n_added, n_updated, n_removed
+        # Carpetas que ya no existen
+        gone = self._remove_subtree(root, keep_folders=visited)
+        n_removed += len(gone)
+        if on_folder and gone:
+            on_folder([], gone)
+        self._forget_snapshots(root, keep=visited)
+        return n_added, n_updated, n_removed
+
+    def scan_folder(self, folder):
+        """Sincroniza una sola carpeta tras un cambio en ella.
+
+        Devuelve (cambiados, eliminados, subcarpetas): rutas de modelos nuevos o
+        actualizados, rutas eliminadas y las subcarpetas que contiene. Si la
+        carpeta ya no existe se eliminan todos los modelos que colgaban de ella.
+        """
+        folder = os.path.abspath(folder)
+        try:
+            st = os.stat(folder)
+            groups, files, subdirs = scan_sidecars(folder)
+        except OSError:
+            self._forget_snapshots(folder)
+            return [], self._remove_subtree(folder), []
+        added, updated, removed, n_stats = self._scan_dir(folder, files, groups)
+        self._save_snapshot(folder, st, subdirs, n_stats)
+        return added + updated, removed, subdirs
+
+    def refresh_file(self, path, sha256=None):
+        """Vuelve a indexar un único modelo (p. ej. tras bajar su .json de Civitai)."""
+        path = os.path.abspath(path)
+        root, file = os.path.split(path)
+        try:
+            groups = scan_sidecars(root)[0]
+            with self._lock:
+                old = self._existing(root).get(path)
+            values = self._row_values(root, file, groups, old, sha256=sha256)
+        except OSError:
+            self.remove(path)
+            return
+        if values is not None:
+            with self._lock, self._conn:
+                self._upsert([values])
+
+    def get(self, path):
+        with self._lock:
+            return self._conn.execute("SELECT * FROM models WHERE path = ?", (os.path.abspath(path),)).fetchone()
+
+    def remove(self, path):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM models WHERE path = ?", (os.path.abspath(path),))
+
+    def models(self, folder):
+        """Filas de los modelos bajo folder (incluidas subcarpetas), ordenadas por carpeta y nombre."""
+        folder = os.path.abspath(folder)
+        lo, hi = _subtree_bounds(folder)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM models WHERE folder = ? OR (folder >= ? AND folder < ?) ORDER BY folder, name",
+                (folder, lo, hi)).fetchall()
+
+    def subfolders(self, folder):
+        """Nombres de las subcarpetas directas de folder que contienen algún modelo."""
+        lo, hi = _subtree_bounds(folder)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT folder FROM models WHERE folder >= ? AND folder < ?", (lo, hi)).fetchall()
+        return sorted({row['folder'][len(lo):].split(os.sep, 1)[0] for row in rows})
+
+    def match_metadata(self, terms, folder=None, path=None):
+        """Busca en los metadatos de Civitai con los términos de parse_query.
+
+        Devuelve el set de rutas de los modelos bajo folder (o sólo path si
+        se indica) que encajan, o None si no hay términos. No abre ningún
+        .json: todo sale de models_fts. No se calcula bm25: con miles de
+        coincidencias multiplica el coste de la consulta, y el orden lo da la
+        galería (texto libre o carpeta y nombre).
+        """
+        expression = fts_expression(terms)
+        if not expression:
+            return None
+        sql = "SELECT m.path FROM models_fts JOIN models m ON m.id = models_fts.rowid WHERE models_fts MATCH ?"
+        params = [expression]
+        if path is not None:
+            sql += " AND m.path = ?"
+            params.append(os.path.abspath(path))
+        elif folder is not None:
+            folder = os.path.abspath(folder)
+            lo, hi = _subtree_bounds(folder)
+            sql += " AND (m.folder = ? OR (m.folder >= ? AND m.folder < ?))"
+            params += [folder, lo, hi]
+        with self._lock:
+            return {row[0] for row in self._conn.execute(sql, params)}
+
+    def base_models(self):
+        """Modelos base de toda la biblioteca, leídos del catálogo (sin recorrer models)."""
+        return sorted(self.base_model_counts())
+
+    def base_model_counts(self):
+        """{modelo base: número de modelos} de toda la biblioteca."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT base_model, refs FROM base_models").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,24 +1,36 @@
 import os
 import sys
 import json
-import shutil
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QFileDialog, 
-                            QScrollArea, QGridLayout, QCheckBox, QLineEdit,
+                            QScrollArea, QCheckBox, QLineEdit,
                             QGroupBox, QListWidget, QListWidgetItem, QStackedLayout,
                             QComboBox, QTextEdit, QDialog, QProgressBar, QFormLayout,
-                            QTableWidget, QTableWidgetItem, QMessageBox)
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QTimer, QByteArray, QThread, pyqtSlot, QObject
-from PyQt6.QtGui import QPixmap, QImage, QColor, QPainter
-from PIL import Image
+                            QTableWidget, QTableWidgetItem, QSpinBox)
+from PyQt6.QtCore import Qt, QSize, pyqtSignal, QTimer, QByteArray, QThread, pyqtSlot, QObject, QFileSystemWatcher
+from PyQt6.QtGui import QPixmap, QPainter
 import math
-from io import BytesIO
 import base64
 from civitai import CivitaiAPI
+from hash_cache import HashCache
+from response_cache import ResponseCache, DAY
+from sync_pipeline import SyncPipeline, build_work_set, walk_work_set
+from download_scheduler import DownloadScheduler
+from thumbnail_cache import ThumbnailCache
+from library_index import LibraryIndex, parse_query
+from search_index import SearchIndex
+from facet_index import FacetIndex, FACETS
+from sidecars import scan_sidecars
+from deploy import Deployer, is_deployed_copy
+from thumbnail_loader import ThumbnailLoader, PRIORITY_APPLIED
+from gallery import LoraEntry, GalleryModel, GalleryDelegate, create_gallery_view, set_gallery_item_size
 import requests
-import glob
-import traceback
+
+# Con más cambios que esto en una tanda del escaneo se recarga la galería entera
+SCAN_BATCH_RELOAD = 500
+# Espera tras la última tecla antes de lanzar la búsqueda
+SEARCH_DEBOUNCE_MS = 150
 
 class LogDialog(QDialog):
     def __init__(self, parent=None):
@@ -48,55 +60,164 @@ class CivitaiWorker(QObject):
     progress = pyqtSignal(int, int)  # current, total
     preview_downloaded = pyqtSignal()
     json_updated = pyqtSignal()
-    def __init__(self, api_key, lora_folder):
+    cache_stats = pyqtSignal(int, int)  # aciertos de caché, consultas totales
+    model_synced = pyqtSignal(str)  # ruta del .safetensors recién actualizado
+    def __init__(self, api_key, lora_folder, hash_workers=2, lookup_workers=4, download_workers=4,
+                 hit_ttl_days=7, miss_ttl_days=1, force_refresh=False, lookup_batch_size=100,
+                 scope="folder", stale_days=30, selection=None,
+                 download_concurrency=6, download_per_host=3, download_max_kbps=0, walk_workers=8):
         super().__init__()
         self.api_key = api_key
         self.lora_folder = lora_folder
+        self.scope = scope
+        self.stale_days = stale_days
+        self.selection = list(selection or [])
+        self.download_concurrency = download_concurrency
+        self.download_per_host = download_per_host
+        self.download_max_kbps = download_max_kbps
+        self.walk_workers = walk_workers
+        self.hit_ttl_days = hit_ttl_days
+        self.miss_ttl_days = miss_ttl_days
+        self.force_refresh = force_refresh
+        self.lookup_batch_size = lookup_batch_size
+        self.hash_workers = hash_workers
+        self.lookup_workers = lookup_workers
+        self.download_workers = download_workers
         self._abort = False
     def abort(self):
         self._abort = True
+    def _on_synced(self, library_index, path, sha256):
+        library_index.refresh_file(path, sha256=sha256)
+        self.model_synced.emit(path)
     @pyqtSlot()
     def run(self):
         from civitai import CivitaiAPI
-        api = CivitaiAPI(api_key=self.api_key, log_func=self.log_signal.emit)
+        hash_cache = HashCache()
+        library_index = LibraryIndex()
+        response_cache = ResponseCache(hit_ttl=self.hit_ttl_days * DAY, miss_ttl=self.miss_ttl_days * DAY)
+        downloads = DownloadScheduler(
+            max_concurrency=self.download_concurrency,
+            per_host_limit=self.download_per_host,
+            max_bytes_per_sec=self.download_max_kbps * 1024,
+        )
+        api = CivitaiAPI(api_key=self.api_key, log_func=self.log_signal.emit, hash_cache=hash_cache,
+                         response_cache=response_cache, force_refresh=self.force_refresh,
+                         download_scheduler=downloads, walk_workers=self.walk_workers)
         api.set_preview_callback(self.preview_downloaded.emit)
         api.set_json_callback(self.json_updated.emit)
-        ok = 0
-        fail = 0
-        safetensors = []
-        for root, dirs, files in os.walk(self.lora_folder):
-            for file in files:
-                if file.lower().endswith('.safetensors'):
-                    safetensors.append((root, file))
-        total = len(safetensors)
-        processed = 0
         try:
-            for root, file in safetensors:
-                if self._abort:
-                    self.log_signal.emit("Proceso abortado por el usuario.")
-                    break
-                safetensor_path = os.path.join(root, file)
-                self.log_signal.emit(f"Calculando hash para: {safetensor_path}")
-                try:
-                    file_hash = api.hash_file(safetensor_path)
-                    self.log_signal.emit(f"Hash: {file_hash}")
-                    model_info = api.get_model_info_by_hash(file_hash)
-                    if model_info:
-                        self.log_signal.emit(f"Encontrado en Civitai. Descargando archivos...")
-                        api.download_model_files(model_info, root, safetensor_path=safetensor_path)
-                        self.log_signal.emit(f"✔️ {file} actualizado.")
-                        ok += 1
-                    else:
-                        self.log_signal.emit(f"❌ {file} no encontrado en Civitai.")
-                        fail += 1
-                except Exception as e:
-                    self.log_signal.emit(f"❌ Error con {file}: {e}")
-                    fail += 1
-                processed += 1
-                self.progress.emit(processed, total)
+            safetensors, skipped = build_work_set(
+                self.lora_folder, scope=self.scope, stale_days=self.stale_days, selection=self.selection,
+                index=library_index)
+            walk_stats = None
+            if not safetensors and not skipped and self.scope != "selection":
+                # Índice aún vacío (primer escaneo en curso): recorrer el disco e ir
+                # hasheando cada carpeta en cuanto se lista
+                walk_stats = {'skipped': 0}
+                safetensors = walk_work_set(
+                    self.lora_folder, scope=self.scope, stale_days=self.stale_days, workers=self.walk_workers,
+                    stats=walk_stats, abort_check=lambda: self._abort)
+                self.log_signal.emit("Índice vacío: sincronizando según se recorre el disco.")
+            else:
+                self.log_signal.emit(
+                    f"{len(safetensors)} archivos a sincronizar, {skipped} omitidos por el alcance elegido.")
+            pipeline = SyncPipeline(
+                api,
+                hash_workers=self.hash_workers,
+                lookup_workers=self.lookup_workers,
+                download_workers=self.download_workers,
+                lookup_batch_size=self.lookup_batch_size,
+                log_func=self.log_signal.emit,
+                progress_func=self.progress.emit,
+                abort_check=lambda: self._abort,
+                synced_func=lambda path, sha256: self._on_synced(library_index, path, sha256),
+            )
+            ok, fail = pipeline.run(safetensors)
+            if walk_stats is not None:
+                self.log_signal.emit(
+                    f"{pipeline.total} archivos sincronizados, {walk_stats['skipped']} omitidos por el alcance elegido.")
+            if self._abort:
+                self.log_signal.emit("Proceso abortado por el usuario.")
+            self.log_signal.emit(f"Caché de hashes: {hash_cache.hits} reutilizados, {hash_cache.misses} calculados.")
+            cached = response_cache.hits + response_cache.negative_hits
+            self.log_signal.emit(
+                f"Caché de Civitai: {cached} respuestas reutilizadas ({response_cache.negative_hits} sin coincidencia), "
+                f"{response_cache.lookups} consultas a la API ({response_cache.hit_rate():.0%} de aciertos)."
+            )
+            self.cache_stats.emit(cached, cached + response_cache.lookups)
+            self.log_signal.emit(api.http.summary())
             self.finished.emit(ok, fail)
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            hash_cache.close()
+            library_index.close()
+            response_cache.close()
+            downloads.close()
+            api.close()
+
+class FacetCombo(QComboBox):
+    """Combo de una faceta: "(All)" y cada valor con su número de LORAs."""
+    def __init__(self, facet, label_func=str, parent=None):
+        super().__init__(parent)
+        self.facet = facet
+        self.label_func = label_func
+        self.setMinimumWidth(120)
+        self.addItem("(All)", None)
+    def value(self):
+        return self.currentData() if self.currentIndex() > 0 else None
+    def _values(self):
+        return [self.itemData(i) for i in range(1, self.count())]
+    def set_counts(self, counts, values=None, selected=None):
+        """Lista values (por defecto los de counts) con su recuento y elige selected.
+
+        El valor elegido se mantiene en la lista aunque ya no tenga LORAs.
+        Si los valores no cambian sólo se reescriben los textos.
+        """
+        values = set(counts if values is None else values)
+        if selected is not None:
+            values.add(selected)
+        ordered = sorted(values, key=lambda v: self.label_func(v).lower())
+        self.blockSignals(True)
+        if ordered != self._values():
+            self.clear()
+            self.addItem("(All)", None)
+            for value in ordered:
+                self.addItem(f"{self.label_func(value)} ({counts.get(value, 0)})", value)
+        else:
+            for i, value in enumerate(ordered, 1):
+                text = f"{self.label_func(value)} ({counts.get(value, 0)})"
+                if self.itemText(i) != text:
+                    self.setItemText(i, text)
+        index = 0
+        if selected is not None:
+            # Sin findData: True == 1 y None no se distinguen bien como QVariant
+            index = next((i for i, value in enumerate(ordered, 1) if value == selected and type(value) is type(selected)), 0)
+        self.setCurrentIndex(index)
+        self.blockSignals(False)
+
+class LibraryScanWorker(QObject):
+    finished = pyqtSignal(int, int, int)  # nuevos, actualizados, eliminados
+    folder_scanned = pyqtSignal(list, list)  # rutas cambiadas y eliminadas de una carpeta
+    error = pyqtSignal(str)
+    def __init__(self, library_index, lora_folder, force=False, workers=8):
+        super().__init__()
+        self.library_index = library_index
+        self.lora_folder = lora_folder
+        self.force = force
+        self.workers = workers
+        self._abort = False
+    def abort(self):
+        self._abort = True
+    @pyqtSlot()
+    def run(self):
+        try:
+            added, updated, removed = self.library_index.scan(
+                self.lora_folder, abort_check=lambda: self._abort, force=self.force, workers=self.workers,
+                on_folder=self.folder_scanned.emit)
+            self.finished.emit(added, updated, removed)
+        except Exception as e:
+            self.error.emit(str(e))
 
 class LoraInfoDialog(QDialog):
     def __init__(self, json_path, parent=None, extra_fields=None):
@@ -209,7 +330,6 @@ class LoraInfoDialog(QDialog):
 class LoraManager(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.base_models_path = "base_models.json"  # <--- Mueve aquí esta línea
         self.setWindowTitle("LORA Model Manager")
         self.setMinimumSize(1000, 800)  # Increased window size
         
@@ -293,6 +413,39 @@ class LoraManager(QMainWindow):
         # Load saved paths (ANTES de crear widgets)
         self.settings_file = "lora_manager_settings.json"
         self.load_settings()
+        self.thumbnail_cache = ThumbnailCache(max_bytes=self.thumbnail_cache_mb * 1024 * 1024)
+        self.thumbnail_loader = ThumbnailLoader(self.thumbnail_cache, parent=self)
+        # Índice de la biblioteca: la galería se sirve de él y se resincroniza en segundo plano
+        self.library_index = LibraryIndex()
+        self.scan_thread = None
+        self._rescan_pending = False
+        self._rescan_force = False
+        # Cambios en disco: se agrupan y se aplican sólo las diferencias
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self._on_fs_changed)
+        # Los sidecars se vigilan uno a uno: reescribirlos en sitio no cambia la carpeta
+        self.fs_watcher.fileChanged.connect(self._on_fs_file_changed)
+        self._fs_pending_dirs = set()
+        self._fs_pending_files = set()
+        self._sidecar_models = {}  # sidecar vigilado -> rutas de los modelos que lo usan
+        self._fs_timer = QTimer(self)
+        self._fs_timer.setSingleShot(True)
+        self._fs_timer.setInterval(300)
+        self._fs_timer.timeout.connect(self._apply_fs_changes)
+        # Recuentos de facetas tras cambios en vivo (escaneo, vigilante, Civitai)
+        self._facet_counts_timer = QTimer(self)
+        self._facet_counts_timer.setSingleShot(True)
+        self._facet_counts_timer.setInterval(200)
+        self._facet_counts_timer.timeout.connect(self._refresh_facet_counts)
+        # Resultados del escaneo por carpeta, aplicados a la galería por tandas
+        self._scan_changed = []
+        self._scan_removed = []
+        self._scan_flush_timer = QTimer(self)
+        self._scan_flush_timer.setSingleShot(True)
+        self._scan_flush_timer.setInterval(200)
+        self._scan_flush_timer.timeout.connect(self._flush_scanned)
+        # Dictionary to store selected LORAs
+        self.selected_applied_loras = set()
         
         # Create main widget and layout
         main_widget = QWidget()
@@ -321,6 +474,18 @@ class LoraManager(QMainWindow):
         self.sidebar_layout.addWidget(self.lora_path_btn)
         self.sidebar_layout.addWidget(self.output_path_label)
         self.sidebar_layout.addWidget(self.output_path_btn)
+        # Cómo se despliegan los LORAs aplicados en output_path
+        self.deploy_mode_combo = QComboBox()
+        self.deploy_mode_combo.addItem("Automático", "auto")
+        self.deploy_mode_combo.addItem("Enlace simbólico", "symlink")
+        self.deploy_mode_combo.addItem("Enlace duro (mismo disco)", "hardlink")
+        self.deploy_mode_combo.addItem("Clon reflink (copy-on-write)", "reflink")
+        self.deploy_mode_combo.addItem("Copia", "copy")
+        index = self.deploy_mode_combo.findData(self.deploy_mode)
+        self.deploy_mode_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.deploy_mode_combo.currentIndexChanged.connect(self.on_deploy_mode_changed)
+        self.sidebar_layout.addWidget(QLabel("Modo de despliegue:"))
+        self.sidebar_layout.addWidget(self.deploy_mode_combo)
         self.sidebar_layout.addWidget(self.zoom_out_btn)
         self.sidebar_layout.addWidget(self.zoom_in_btn)
         # --- NUEVO: API key y botón de actualización ---
@@ -335,10 +500,33 @@ class LoraManager(QMainWindow):
         self.civitai_update_btn = QPushButton("Actualizar metadatos desde Civitai")
         self.civitai_update_btn.clicked.connect(self.on_civitai_update_clicked)
         self.sidebar_layout.addWidget(self.civitai_update_btn)
-        # --- NUEVO: Botón para actualizar filtro modelos base ---
-        self.update_base_models_btn = QPushButton("Actualizar filtro modelos base")
-        self.update_base_models_btn.clicked.connect(self.on_update_base_models_clicked)
-        self.sidebar_layout.addWidget(self.update_base_models_btn)
+        self.civitai_force_refresh_check = QCheckBox("Forzar refresco (ignorar caché de Civitai)")
+        self.sidebar_layout.addWidget(self.civitai_force_refresh_check)
+        # Alcance de la sincronización
+        self.civitai_scope_combo = QComboBox()
+        self.civitai_scope_combo.addItem("Sólo sin .json", "missing")
+        self.civitai_scope_combo.addItem("Sólo .json antiguos", "stale")
+        self.civitai_scope_combo.addItem("Carpeta actual", "folder")
+        self.civitai_scope_combo.addItem("Selección actual", "selection")
+        self.civitai_scope_combo.addItem("Biblioteca completa", "full")
+        index = self.civitai_scope_combo.findData(self.civitai_sync_scope)
+        self.civitai_scope_combo.setCurrentIndex(index if index >= 0 else 2)
+        self.civitai_scope_combo.currentIndexChanged.connect(self.on_civitai_scope_changed)
+        self.civitai_stale_days_spin = QSpinBox()
+        self.civitai_stale_days_spin.setRange(1, 3650)
+        self.civitai_stale_days_spin.setSuffix(" días")
+        self.civitai_stale_days_spin.setValue(self.civitai_stale_days)
+        self.civitai_stale_days_spin.setEnabled(self.civitai_sync_scope == "stale")
+        self.civitai_stale_days_spin.valueChanged.connect(self.on_civitai_scope_changed)
+        scope_layout = QHBoxLayout()
+        scope_layout.addWidget(self.civitai_scope_combo)
+        scope_layout.addWidget(self.civitai_stale_days_spin)
+        self.sidebar_layout.addWidget(QLabel("Alcance de la actualización:"))
+        self.sidebar_layout.addLayout(scope_layout)
+        # Resincronización completa del índice (también archivos reescritos en sitio)
+        self.full_rescan_btn = QPushButton("Reescanear biblioteca completa")
+        self.full_rescan_btn.clicked.connect(self.on_full_rescan_clicked)
+        self.sidebar_layout.addWidget(self.full_rescan_btn)
         # Barra de progreso para actualización Civitai
         self.civitai_progress = QProgressBar()
         self.civitai_progress.setMinimum(0)
@@ -352,8 +540,10 @@ class LoraManager(QMainWindow):
         self.civitai_summary_layout = QFormLayout()
         self.civitai_summary_label_previews = QLabel("0")
         self.civitai_summary_label_json = QLabel("0")
+        self.civitai_summary_label_cache = QLabel("-")
         self.civitai_summary_layout.addRow("Previews descargados:", self.civitai_summary_label_previews)
         self.civitai_summary_layout.addRow("JSON actualizados:", self.civitai_summary_label_json)
+        self.civitai_summary_layout.addRow("Aciertos caché Civitai:", self.civitai_summary_label_cache)
         self.civitai_summary_group.setLayout(self.civitai_summary_layout)
         self.sidebar_layout.addWidget(self.civitai_summary_group)
         # --- FIN NUEVO ---
@@ -377,18 +567,42 @@ class LoraManager(QMainWindow):
         self.central_vbox.setContentsMargins(20, 20, 20, 20)
         # Search box
         search_group = QGroupBox("")
+        search_vbox = QVBoxLayout()
         search_layout = QHBoxLayout()
         self.search_label = QLabel("Search:")
         self.search_box = QLineEdit()
-        self.search_box.setPlaceholderText("Search by name or path...")
-        self.search_box.textChanged.connect(self.filter_loras)
-        # --- NUEVO: Filtro Model ---
+        self.search_box.setPlaceholderText('Search by name, path or trigger words; tag:, creator:, prompt:"..."')
+        self.search_box.setToolTip(
+            "Texto libre: nombre, carpeta y trainedWords (admite errores de escritura).\n"
+            "Metadatos de Civitai: tag:, creator:, prompt:, negative:, resource:, desc:, name:, word:, text:\n"
+            'Ejemplo: tag:anime creator:foo prompt:"red dress"')
+        # Buscar cuando se deja de escribir, no con cada tecla
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self.filter_loras)
+        self.search_box.textChanged.connect(self._search_timer.start)
+        self.search_box.returnPressed.connect(self.filter_loras)
+        # Facetas: modelo base en la fila de búsqueda y el resto debajo, cada valor con su recuento
+        self.facet_index = FacetIndex()
+        self._facet_scope = None  # bitmap de los resultados de la búsqueda (None sin búsqueda)
+        self._base_model_catalogue = []
         self.model_filter_label = QLabel("Model:")
-        self.model_filter_combo = QComboBox()
-        self.model_filter_combo.setMinimumWidth(120)
-        self.model_filter_combo.addItem("(All)")
-        self.model_filter_combo.currentIndexChanged.connect(self.filter_loras)
-        self.load_model_filter_options()
+        self.model_filter_combo = FacetCombo('base_model')
+        self.facet_combos = {
+            'base_model': self.model_filter_combo,
+            'model_type': FacetCombo('model_type'),
+            'nsfw': FacetCombo('nsfw', label_func=lambda v: "NSFW" if v else "SFW"),
+            'creator': FacetCombo('creator'),
+            'tags': FacetCombo('tags'),
+        }
+        for combo in self.facet_combos.values():
+            combo.currentIndexChanged.connect(lambda _, facet=combo.facet: self.on_facet_changed(facet))
+        facet_layout = QHBoxLayout()
+        for label, facet in (("Type:", 'model_type'), ("NSFW:", 'nsfw'), ("Creator:", 'creator'), ("Tag:", 'tags')):
+            facet_layout.addWidget(QLabel(label))
+            facet_layout.addWidget(self.facet_combos[facet])
+        facet_layout.addStretch()
         # Combo para subcarpetas y breadcrumb
         self.folder_breadcrumb = QLabel("")
         self.folder_combo = QComboBox()
@@ -401,20 +615,30 @@ class LoraManager(QMainWindow):
         search_layout.addWidget(self.model_filter_combo)
         search_layout.addWidget(self.folder_breadcrumb)
         search_layout.addWidget(self.folder_combo)
-        search_group.setLayout(search_layout)
+        search_vbox.addLayout(search_layout)
+        search_vbox.addLayout(facet_layout)
+        search_group.setLayout(search_vbox)
         self.central_vbox.addWidget(search_group)
         # Available LORAs section
         available_group = QGroupBox("Available LORAs")
         available_layout = QVBoxLayout()
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.thumbnail_scroll = scroll
-        self.thumbnail_widget = QWidget()
-        self.thumbnail_layout = QGridLayout(self.thumbnail_widget)
-        self.thumbnail_layout.setSpacing(20)
-        scroll.setWidget(self.thumbnail_widget)
-        available_layout.addWidget(scroll)
+        # Galería virtualizada: sólo se pintan (y decodifican) los LORAs a la vista
+        self.search_index = SearchIndex()
+        self.gallery_model = GalleryModel(self.thumbnail_loader, self.thumbnail_size,
+                                          is_selected=self.selected_applied_loras.__contains__,
+                                          search_index=self.search_index, facet_index=self.facet_index,
+                                          parent=self)
+        self.gallery_delegate = GalleryDelegate(self.thumbnail_size, parent=self)
+        self.gallery_delegate.toggled.connect(self.toggle_lora_selection)
+        self.gallery_delegate.info_requested.connect(self.show_lora_info)
+        self.gallery_view = create_gallery_view(self.gallery_model, self.gallery_delegate)
+        # Al hacer scroll se cancelan las miniaturas que ya salieron de pantalla
+        self._thumb_prune_timer = QTimer(self)
+        self._thumb_prune_timer.setSingleShot(True)
+        self._thumb_prune_timer.setInterval(50)
+        self._thumb_prune_timer.timeout.connect(self.cancel_hidden_thumbnails)
+        self.gallery_view.verticalScrollBar().valueChanged.connect(self._thumb_prune_timer.start)
+        available_layout.addWidget(self.gallery_view)
         available_group.setLayout(available_layout)
         self.central_vbox.addWidget(available_group)
         # Apply button
@@ -424,15 +648,14 @@ class LoraManager(QMainWindow):
         # Selected LORAs section
         selected_group = QGroupBox("Selected LORAs")
         selected_layout = QVBoxLayout()
-        selected_scroll = QScrollArea()
-        selected_scroll.setWidgetResizable(False)
-        selected_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.selected_widget = QWidget()
-        self.selected_layout = QHBoxLayout(self.selected_widget)
-        self.selected_layout.setSpacing(20)
-        self.selected_widget.setMinimumHeight(self.thumbnail_size + 24)
-        selected_scroll.setWidget(self.selected_widget)
-        selected_layout.addWidget(selected_scroll)
+        self.applied_model = GalleryModel(self.thumbnail_loader, self.thumbnail_size, key_prefix="applied:",
+                                          priority=PRIORITY_APPLIED,
+                                          is_selected=self.selected_applied_loras.__contains__, parent=self)
+        self.applied_delegate = GalleryDelegate(self.thumbnail_size, show_folder=False, show_info=False, parent=self)
+        self.applied_delegate.toggled.connect(self.toggle_lora_selection)
+        self.selected_view = create_gallery_view(self.applied_model, self.applied_delegate, horizontal=True)
+        self.update_selected_view_height()
+        selected_layout.addWidget(self.selected_view)
         # Buttons for managing selected LORAs
         buttons_layout = QHBoxLayout()
         buttons_layout.setSpacing(10)
@@ -452,88 +675,45 @@ class LoraManager(QMainWindow):
         # Sidebar: restaurar estado guardado
         self.set_sidebar_visible(self.sidebar_visible)
         
-        # Dictionary to store selected LORAs
-        self.selected_applied_loras = set()
-        # Dictionary to store all LORA widgets
-        self.all_thumbnail_widgets = {}
-        
-        # Load LORAs and refresh selected list
-        QTimer.singleShot(0, self.load_loras)
+        # Refresh selected list
         QTimer.singleShot(0, self.refresh_selected_list)
         
         # --- Restaurar estado tras crear widgets y layouts ---
         self.set_sidebar_visible(self.sidebar_visible)
         self.update_folder_combo()
+        self.load_model_filter_options()
         self.load_loras()
+        QTimer.singleShot(0, self.rescan_library)
         # Iniciar siempre maximizada
         QTimer.singleShot(0, self.showMaximized)
     
     def refresh_selected_list(self):
         """Refresh the list of selected LORAs"""
-        # Clear existing thumbnails
-        while self.selected_layout.count():
-            item = self.selected_layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.setParent(None)
-        if not os.path.exists(self.output_path):
-            self.selected_widget.setMinimumWidth(0)
-            self.selected_widget.setMinimumHeight(self.thumbnail_size + 24)
-            return
-        # Group files by LORA
-        lora_files = {}
-        for file in os.listdir(self.output_path):
-            file_path = os.path.join(self.output_path, file)
-            # Ahora simplemente agrupa por nombre base, ya que son archivos copiados
-            if file.lower().endswith('.safetensors'):
-                lora_name = os.path.splitext(file)[0]
-                lora_dir = self.output_path
-                if lora_name not in lora_files:
-                    lora_files[lora_name] = {
-                        'model': file_path,
-                        'preview': None,
-                        'config': None
-                    }
-            elif file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                lora_name = os.path.splitext(file)[0].replace('.preview', '')
-                if lora_name in lora_files:
-                    lora_files[lora_name]['preview'] = file_path
-            elif file.lower().endswith(('.yaml', '.yml', '.json')):
-                lora_name = os.path.splitext(file)[0]
-                if lora_name in lora_files:
-                    lora_files[lora_name]['config'] = file_path
         self.selected_applied_loras.clear()  # Limpiar selección al refrescar panel de abajo
-        lora_items = list(lora_files.items())
-        for lora_name, files in lora_items:
-            lora_dir = os.path.dirname(files['model'])
-            preview_path = None
-            preview_base = f"{lora_name}.preview"
-            for ext in ['.png', '.jpg', '.jpeg']:
-                test_path = os.path.join(lora_dir, f"{preview_base}{ext}")
-                if os.path.exists(test_path):
-                    preview_path = test_path
-                    break
-            if preview_path is None:
-                for ext in ['.png', '.jpg', '.jpeg']:
-                    test_path = os.path.join(lora_dir, f"{lora_name}{ext}")
-                    if os.path.exists(test_path):
-                        preview_path = test_path
-                        break
-            if preview_path is None:
-                preview_path = os.path.join(lora_dir, f"{lora_name}.preview.png")
-                if not os.path.exists(preview_path):
-                    preview_path = os.path.join(lora_dir, "preview.png")
-            thumbnail_widget = self.create_thumbnail_widget(files['model'], lora_name, preview_path, is_applied=True)
-            self.selected_layout.addWidget(thumbnail_widget)
-        # Ajustar el ancho mínimo del widget contenedor
-        num_loras = len(lora_items)
-        if num_loras > 0:
-            total_width = num_loras * (self.thumbnail_size + self.selected_layout.spacing())
-            self.selected_widget.setMinimumWidth(total_width)
-        else:
-            self.selected_widget.setMinimumWidth(0)
-        self.selected_widget.setMinimumHeight(self.thumbnail_size + 24)
+        self.applied_model.set_entries(self._applied_entries())
         self.update_remove_all_btn_text()
+
+    def _applied_entries(self):
+        """Entradas del panel de aplicados a partir del contenido de output_path."""
+        if not os.path.exists(self.output_path):
+            return []
+        # Un único scandir agrupa cada modelo con su preview y su config
+        groups = scan_sidecars(self.output_path)[0]
+        entries = []
+        for group in groups.values():
+            if group.model is None:
+                continue
+            lora_name = os.path.splitext(group.model)[0]
+            model_path = os.path.join(self.output_path, group.model)
+            has_json = lora_name + ".json" in group.configs
+            entries.append(LoraEntry(model_path, lora_name, ".", group.preview(self.output_path),
+                                     group.config(self.output_path, lora_name), has_json=has_json))
+        return entries
+
+    def update_selected_view_height(self):
+        """Alto del panel de aplicados: una fila de miniaturas más la barra de scroll."""
+        scrollbar = self.selected_view.horizontalScrollBar().sizeHint().height()
+        self.selected_view.setFixedHeight(self.thumbnail_size + self.applied_delegate.spacing + scrollbar)
     
     def update_remove_all_btn_text(self):
         if self.selected_applied_loras:
@@ -570,6 +750,21 @@ class LoraManager(QMainWindow):
                 self.selected_lora_subfolder = settings.get('selected_lora_subfolder', "")
                 self.civitai_api_key = settings.get('civitai_api_key', '')
                 self.selected_model_filter = settings.get('selected_model_filter', "(All)")
+                self.facet_filters = settings.get('facet_filters', {})
+                self.civitai_hash_workers = settings.get('civitai_hash_workers', 2)
+                self.civitai_lookup_workers = settings.get('civitai_lookup_workers', 4)
+                self.civitai_download_workers = settings.get('civitai_download_workers', 4)
+                self.civitai_hit_ttl_days = settings.get('civitai_hit_ttl_days', 7)
+                self.civitai_miss_ttl_days = settings.get('civitai_miss_ttl_days', 1)
+                self.civitai_lookup_batch_size = settings.get('civitai_lookup_batch_size', 100)
+                self.civitai_sync_scope = settings.get('civitai_sync_scope', "folder")
+                self.civitai_stale_days = settings.get('civitai_stale_days', 30)
+                self.civitai_download_concurrency = settings.get('civitai_download_concurrency', 6)
+                self.civitai_download_per_host = settings.get('civitai_download_per_host', 3)
+                self.civitai_download_max_kbps = settings.get('civitai_download_max_kbps', 0)
+                self.thumbnail_cache_mb = settings.get('thumbnail_cache_mb', 512)
+                self.scan_workers = settings.get('scan_workers', 8)
+                self.deploy_mode = settings.get('deploy_mode', 'auto')
         except FileNotFoundError:
             self.lora_path = self.default_lora_path
             self.output_path = self.default_output_path
@@ -578,6 +773,21 @@ class LoraManager(QMainWindow):
             self.selected_lora_subfolder = ""
             self.civitai_api_key = ''
             self.selected_model_filter = "(All)"
+            self.facet_filters = {}
+            self.civitai_hash_workers = 2
+            self.civitai_lookup_workers = 4
+            self.civitai_download_workers = 4
+            self.civitai_hit_ttl_days = 7
+            self.civitai_miss_ttl_days = 1
+            self.civitai_lookup_batch_size = 100
+            self.civitai_sync_scope = "folder"
+            self.civitai_stale_days = 30
+            self.civitai_download_concurrency = 6
+            self.civitai_download_per_host = 3
+            self.civitai_download_max_kbps = 0
+            self.thumbnail_cache_mb = 512
+            self.scan_workers = 8
+            self.deploy_mode = 'auto'
     
     def save_settings(self):
         settings = {
@@ -587,7 +797,22 @@ class LoraManager(QMainWindow):
             'sidebar_visible': self.sidebar_visible,
             'selected_lora_subfolder': self.selected_lora_subfolder,
             'civitai_api_key': getattr(self, 'civitai_api_key', ''),
-            'selected_model_filter': self.model_filter_combo.currentText()
+            'selected_model_filter': self.selected_model_filter,
+            'facet_filters': self.facet_filters,
+            'civitai_hash_workers': self.civitai_hash_workers,
+            'civitai_lookup_workers': self.civitai_lookup_workers,
+            'civitai_download_workers': self.civitai_download_workers,
+            'civitai_hit_ttl_days': self.civitai_hit_ttl_days,
+            'civitai_miss_ttl_days': self.civitai_miss_ttl_days,
+            'civitai_lookup_batch_size': self.civitai_lookup_batch_size,
+            'civitai_sync_scope': self.civitai_sync_scope,
+            'civitai_stale_days': self.civitai_stale_days,
+            'civitai_download_concurrency': self.civitai_download_concurrency,
+            'civitai_download_per_host': self.civitai_download_per_host,
+            'civitai_download_max_kbps': self.civitai_download_max_kbps,
+            'thumbnail_cache_mb': self.thumbnail_cache_mb,
+            'scan_workers': self.scan_workers,
+            'deploy_mode': self.deploy_mode
         }
         with open(self.settings_file, 'w') as f:
             json.dump(settings, f)
@@ -600,6 +825,7 @@ class LoraManager(QMainWindow):
             self.save_settings()
             self.update_folder_combo()
             self.load_loras()
+            self.rescan_library()
     
     def change_output_path(self):
         new_path = QFileDialog.getExistingDirectory(self, "Select Output Directory", self.output_path)
@@ -608,376 +834,381 @@ class LoraManager(QMainWindow):
             self.output_path_label.setText(f"Output Path: {self.output_path}")
             self.save_settings()
             self.refresh_selected_list()
+            self.watch_library()
     
-    def create_gray_placeholder(self, size=(200, 200)):
-        """Create a gray placeholder image"""
-        image = QImage(size[0], size[1], QImage.Format.Format_RGB32)
-        image.fill(QColor(200, 200, 200))  # Gray color
-        return QPixmap.fromImage(image)
-    
-    def create_thumbnail_widget(self, lora_path, preview_name, preview_path, is_applied=False):
-        """Create a thumbnail widget for a LORA"""
-        thumbnail_widget = QWidget()
-        thumbnail_layout = QVBoxLayout(thumbnail_widget)
-        thumbnail_layout.setSpacing(8)  # Add spacing between elements
-        # No fijar tamaño, dejar que el layout lo ajuste
-        
-        # Create a container for the image and its border
-        image_container = QWidget()
-        image_container.setStyleSheet("""
-            QWidget {
-                background-color: #2d2d2d;
-                border: 1px solid #3d3d3d;
-                border-radius: 5px;
-            }
-            QWidget:hover {
-                background-color: #353535;
-            }
-        """)
-        # Ajustar tamaño del contenedor de la imagen
-        image_container.setFixedSize(self.thumbnail_size, self.thumbnail_size)
-        
-        # Make the container clickable
-        image_container.setCursor(Qt.CursorShape.PointingHandCursor)
-        
-        image_layout = QVBoxLayout(image_container)
-        image_layout.setContentsMargins(10, 10, 10, 10)  # Add padding inside the border
-        image_layout.setSpacing(5)  # Add spacing between elements
-        
-        # Create name label
-        name_label = QLabel(preview_name)
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    def toggle_lora_selection(self, lora_path):
+        """Alterna la selección de un LORA (galería o panel de aplicados)."""
+        if lora_path in self.selected_applied_loras:
+            self.selected_applied_loras.discard(lora_path)
+        else:
+            self.selected_applied_loras.add(lora_path)
+        self.gallery_model.refresh_path(lora_path)
+        self.applied_model.refresh_path(lora_path)
+        self.update_remove_all_btn_text()
+
+    def show_lora_info(self, lora_path):
         lora_json = os.path.splitext(lora_path)[0] + ".json"
         if os.path.exists(lora_json):
-            name_label.setStyleSheet("""
-                QLabel {
-                    color: #2196f3;
-                    font-weight: bold;
-                    font-size: 13px;
-                    padding: 5px;
-                }
-            """)
-        else:
-            name_label.setStyleSheet("""
-                QLabel {
-                    color: #ffffff;
-                    font-weight: bold;
-                    font-size: 13px;
-                    padding: 5px;
-                }
-            """)
-        name_label.setCursor(Qt.CursorShape.PointingHandCursor)
-        image_layout.addWidget(name_label)
-        
-        # Add relative path
-        rel_path = os.path.relpath(os.path.dirname(lora_path), self.lora_path)
-        path_label = None
-        if rel_path != "." and not is_applied:
-            path_label = QLabel(rel_path)
-            path_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            path_label.setStyleSheet("""
-                QLabel {
-                    color: #ffffff;
-                    font-size: 11px;
-                    padding: 2px;
-                    background-color: #444857;
-                    border-radius: 3px;
-                    margin: 2px 5px;
-                }
-            """)
-            path_label.setWordWrap(True)  # Allow text to wrap if too long
-            path_label.setCursor(Qt.CursorShape.PointingHandCursor)
-            image_layout.addWidget(path_label)
-        
-        try:
-            if os.path.exists(preview_path):
-                img = Image.open(preview_path)
-                img.thumbnail((self.thumbnail_size, self.thumbnail_size))
-                buffer = BytesIO()
-                img.save(buffer, format="PNG")
-                pixmap = QPixmap()
-                pixmap.loadFromData(buffer.getvalue(), "PNG")
-            else:
-                raise FileNotFoundError
-        except Exception:
-            # No print, just use placeholder
-            pixmap = self.create_gray_placeholder((self.thumbnail_size, self.thumbnail_size))  # Usar tamaño dinámico
-        
-        # Create image label
-        img_label = QLabel()
-        img_label.setPixmap(pixmap)
-        img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        img_label.setCursor(Qt.CursorShape.PointingHandCursor)
-        image_layout.addWidget(img_label)
-        
-        # Add the image container to the main layout
-        thumbnail_layout.addWidget(image_container)
-        
-        if not is_applied:
-            # Selección por click en el contenedor o imagen, info solo en el título
-            def update_selection(selected):
-                if selected:
-                    image_container.setStyleSheet("""
-                        QWidget {
-                            background-color: #1b5e20;
-                            border: 1px solid #2e7d32;
-                            border-radius: 5px;
-                        }
-                        QWidget:hover {
-                            background-color: #2e7d32;
-                        }
-                    """)
+            try:
+                with open(lora_json, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                model_type = data.get('model', {}).get('type', '')
+                if model_type == 'Checkpoint':
+                    dlg = LoraInfoDialog(lora_json, self)
+                    dlg.exec()
                 else:
-                    image_container.setStyleSheet("""
-                        QWidget {
-                            background-color: #2d2d2d;
-                            border: 1px solid #3d3d3d;
-                            border-radius: 5px;
-                        }
-                        QWidget:hover {
-                            background-color: #353535;
-                        }
-                    """)
-            def handle_select(event):
-                current_state = lora_path in self.selected_applied_loras
-                new_state = not current_state
-                if new_state:
-                    self.selected_applied_loras.add(lora_path)
-                else:
-                    self.selected_applied_loras.discard(lora_path)
-                update_selection(new_state)
-                self.update_remove_all_btn_text()
-            def handle_info(event):
-                if os.path.exists(lora_json):
-                    try:
-                        with open(lora_json, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        model_type = data.get('model', {}).get('type', '')
-                        if model_type == 'Checkpoint':
-                            dlg = LoraInfoDialog(lora_json, self)
-                            dlg.exec()
-                        else:
-                            extra_fields = [
-                                'prompt', 'steps', 'negativePrompt',
-                                'Style Selector Style', 'Style Selector Enabled'
-                            ]
-                            dlg = LoraInfoDialog(lora_json, self, extra_fields=extra_fields)
-                            dlg.exec()
-                    except Exception as e:
-                        print(f"Error abriendo info LORA: {e}")
-            # Asignar eventos
-            image_container.mousePressEvent = handle_select
-            img_label.mousePressEvent = handle_select
-            name_label.mousePressEvent = handle_info
-            if path_label is not None:
-                path_label.mousePressEvent = handle_select
-            update_selection(lora_path in self.selected_applied_loras)
-        else:
-            # Panel de abajo: selección múltiple por click, sin botón X ni info
-            def update_selection(selected):
-                if selected:
-                    image_container.setStyleSheet("""
-                        QWidget {
-                            background-color: #1b5e20;
-                            border: 1px solid #2e7d32;
-                            border-radius: 5px;
-                        }
-                        QWidget:hover {
-                            background-color: #2e7d32;
-                        }
-                    """)
-                else:
-                    image_container.setStyleSheet("""
-                        QWidget {
-                            background-color: #2d2d2d;
-                            border: 1px solid #3d3d3d;
-                            border-radius: 5px;
-                        }
-                        QWidget:hover {
-                            background-color: #353535;
-                        }
-                    """)
-            def handle_select(event):
-                current_state = lora_path in self.selected_applied_loras
-                new_state = not current_state
-                if new_state:
-                    self.selected_applied_loras.add(lora_path)
-                else:
-                    self.selected_applied_loras.discard(lora_path)
-                update_selection(new_state)
-                self.update_remove_all_btn_text()
-            image_container.mousePressEvent = handle_select
-            img_label.mousePressEvent = handle_select
-            name_label.mousePressEvent = handle_select
-            if path_label is not None:
-                path_label.mousePressEvent = handle_select
-            update_selection(lora_path in self.selected_applied_loras)
-        
-        return thumbnail_widget
-    
+                    extra_fields = [
+                        'prompt', 'steps', 'negativePrompt',
+                        'Style Selector Style', 'Style Selector Enabled'
+                    ]
+                    dlg = LoraInfoDialog(lora_json, self, extra_fields=extra_fields)
+                    dlg.exec()
+            except Exception as e:
+                print(f"Error abriendo info LORA: {e}")
+
     def load_loras(self):
-        # Clear existing thumbnails
-        for i in reversed(range(self.thumbnail_layout.count())): 
-            self.thumbnail_layout.itemAt(i).widget().setParent(None)
-        self.all_thumbnail_widgets.clear()
-        self.lora_base_model_map = {}
-        
         # Create output directory if it doesn't exist
         os.makedirs(self.output_path, exist_ok=True)
-        
-        # Walk through la carpeta seleccionada
-        row = 0
-        col = 0
-        container_width = self.thumbnail_scroll.viewport().width()
-        self.thumbnail_widget.setFixedWidth(container_width)
-        spacing = self.thumbnail_layout.spacing()
-        max_cols = max(1, int((container_width + spacing) // (self.thumbnail_size + spacing)))
         # Determinar carpeta a mostrar
         if self.selected_lora_subfolder:
             target_dir = os.path.join(self.lora_path, self.selected_lora_subfolder)
         else:
             target_dir = self.lora_path
-        for root, dirs, files in os.walk(target_dir):
-            for file in files:
-                if file.lower().endswith('.safetensors'):
-                    lora_path = os.path.join(root, file)
-                    lora_name = os.path.splitext(file)[0]
-                    # Find associated files
-                    preview_path = None
-                    config_path = None
-                    # Look for preview image with .preview extension
-                    preview_base = f"{lora_name}.preview"
-                    for img_file in files:
-                        if img_file.lower().startswith(preview_base.lower()) and img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                            preview_path = os.path.join(root, img_file)
-                            break
-                    # If no .preview image found, try with just the LORA name
-                    if preview_path is None:
-                        for img_file in files:
-                            if img_file.lower().startswith(lora_name.lower()) and img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                                preview_path = os.path.join(root, img_file)
-                                break
-                    # Look for config file with same base name
-                    for config_file in files:
-                        config_base = os.path.splitext(config_file)[0]
-                        if config_base == lora_name and config_file.lower().endswith(('.yaml', '.yml', '.json')):
-                            config_path = os.path.join(root, config_file)
-                            break
-                    if preview_path is None:
-                        preview_path = os.path.join(root, f"{lora_name}.preview.png")
-                        if not os.path.exists(preview_path):
-                            preview_path = os.path.join(root, "preview.png")
-                    # --- NUEVO: Leer baseModel del JSON asociado ---
-                    base_model_val = None
-                    if config_path and config_path.lower().endswith('.json'):
-                        try:
-                            with open(config_path, 'r', encoding='utf-8') as jf:
-                                jdata = json.load(jf)
-                                base_model_val = jdata.get('baseModel')
-                        except Exception:
-                            pass
-                    search_text = f"{lora_name} {os.path.relpath(root, self.lora_path)}"
-                    self.all_thumbnail_widgets[search_text.lower()] = self.create_thumbnail_widget(lora_path, lora_name, preview_path)
-                    self.lora_base_model_map[search_text.lower()] = base_model_val
-                    # Add to layout
-                    self.thumbnail_layout.addWidget(self.all_thumbnail_widgets[search_text.lower()], row, col)
-                    col += 1
-                    if col >= max_cols:
-                        col = 0
-                        row += 1
-    
+        entries = [self._entry_from_row(row) for row in self.library_index.models(target_dir)]
+        self.gallery_model.set_entries(entries)
+        self.filter_loras()
+        self.thumbnail_cache.save()
+        # Indexar la búsqueda ya, no al pulsar la primera tecla
+        QTimer.singleShot(0, self.search_index.flush)
+
+    def _entry_from_row(self, row):
+        return LoraEntry(row['path'], row['name'], os.path.relpath(row['folder'], self.lora_path),
+                         row['preview'], row['config'], row['base_model'], row['json_mtime_ns'] is not None,
+                         json.loads(row['trained_words'] or '[]'), row['model_type'],
+                         None if row['nsfw'] is None else bool(row['nsfw']), row['creator'],
+                         json.loads(row['tags'] or '[]'))
+
+    def _current_folder(self):
+        if self.selected_lora_subfolder:
+            return os.path.abspath(os.path.join(self.lora_path, self.selected_lora_subfolder))
+        return os.path.abspath(self.lora_path)
+
+    def update_lora_entry(self, lora_path):
+        """Actualiza (o quita) una sola miniatura de la galería a partir del índice."""
+        self.update_lora_entries([lora_path])
+
+    def update_lora_entries(self, lora_paths, removed=()):
+        """Aplica a la galería una tanda de modelos cambiados y quitados de una vez."""
+        folder = self._current_folder()
+        gone = [os.path.abspath(path) for path in removed]
+        entries = []
+        for lora_path in lora_paths:
+            row = self.library_index.get(lora_path)
+            if row is None or not (row['folder'] == folder or row['folder'].startswith(folder + os.sep)):
+                gone.append(os.path.abspath(lora_path))
+            else:
+                entries.append(self._entry_from_row(row))
+        self._facet_counts_timer.start()
+        self.gallery_model.remove_paths(gone)
+        # La visibilidad se evalúa después de indexar las entradas nuevas
+        self.gallery_model.upsert_entries(entries, visible=self.lora_matches_filter)
+
+    # --- Vigilancia del sistema de archivos ---
+    def watch_library(self):
+        """Vigila lora_path (y sus carpetas con modelos), los sidecars de cada modelo y output_path."""
+        watched = self.fs_watcher.directories() + self.fs_watcher.files()
+        if watched:
+            self.fs_watcher.removePaths(watched)
+        self._sidecar_models = {}
+        root = os.path.abspath(self.lora_path)
+        dirs = {root}
+        rows = self.library_index.models(root)
+        for row in rows:
+            folder = row['folder']
+            # También las carpetas intermedias, para ver aparecer subcarpetas nuevas
+            while folder not in dirs and folder.startswith(root + os.sep):
+                dirs.add(folder)
+                folder = os.path.dirname(folder)
+        if os.path.isdir(self.output_path):
+            dirs.add(os.path.abspath(self.output_path))
+        self.fs_watcher.addPaths(sorted(d for d in dirs if os.path.isdir(d)))
+        self._watch_sidecars(rows)
+
+    def _watch_sidecars(self, rows):
+        """Añade al vigilante el .json, el preview y la config de cada fila del índice."""
+        new = []
+        for row in rows:
+            sidecars = {row['config'], row['preview']}
+            if row['json_mtime_ns'] is not None:
+                sidecars.add(os.path.splitext(row['path'])[0] + ".json")
+            for sidecar in sidecars:
+                if not sidecar:
+                    continue
+                models = self._sidecar_models.get(sidecar)
+                if models is None:
+                    # El preview puede ser el preview.png de la carpeta, que quizá no existe
+                    if sidecar == row['preview'] and not os.path.exists(sidecar):
+                        continue
+                    models = self._sidecar_models[sidecar] = set()
+                    new.append(sidecar)
+                models.add(row['path'])
+        if new:
+            self.fs_watcher.addPaths(new)
+
+    def _on_fs_file_changed(self, path):
+        self._fs_pending_files.add(path)
+        if not self._fs_timer.isActive():
+            self._fs_timer.start()
+
+    def _on_fs_changed(self, path):
+        self._fs_pending_dirs.add(path)
+        # Agrupar las ráfagas de eventos (copias, descargas) en una sola pasada
+        if not self._fs_timer.isActive():
+            self._fs_timer.start()
+
+    def _apply_fs_changes(self):
+        pending, self._fs_pending_dirs = self._fs_pending_dirs, set()
+        files, self._fs_pending_files = self._fs_pending_files, set()
+        root = os.path.abspath(self.lora_path)
+        output = os.path.abspath(self.output_path)
+        changed, removed = [], []
+        watched_files = set(self.fs_watcher.files())
+        for sidecar in files:
+            if os.path.exists(sidecar) and sidecar not in watched_files:
+                # Un reemplazo atómico (escribir aparte y renombrar) saca el archivo del vigilante
+                self.fs_watcher.addPath(sidecar)
+            for model in self._sidecar_models.get(sidecar, ()):
+                self.library_index.refresh_file(model)
+                changed.append(model)
+        while pending:
+            folder = os.path.abspath(pending.pop())
+            if folder == output:
+                self.applied_model.sync_entries(self._applied_entries())
+                self.update_remove_all_btn_text()
+                continue
+            if not (folder == root or folder.startswith(root + os.sep)):
+                continue
+            folder_changed, folder_removed, subdirs = self.library_index.scan_folder(folder)
+            changed += folder_changed
+            removed += folder_removed
+            watched = set(self.fs_watcher.directories())
+            for sub in subdirs:
+                if sub not in watched and sub != output:
+                    # Carpeta nueva: vigilarla y escanear su contenido
+                    self.fs_watcher.addPath(sub)
+                    pending.add(sub)
+        removed_set = set(removed)
+        changed = [path for path in dict.fromkeys(changed) if path not in removed_set]
+        self.update_lora_entries(changed, removed)
+        if changed:
+            self._watch_sidecars(row for row in map(self.library_index.get, changed) if row is not None)
+        if changed or removed:
+            self.update_folder_combo()
+            self.load_model_filter_options()
+
+    def _on_lora_synced(self, lora_path):
+        # El worker de Civitai ya actualizó la fila en el índice
+        self.update_lora_entry(lora_path)
+
+    def rescan_library(self, force=False):
+        """Resincroniza en segundo plano el índice con el disco y refresca la vista al terminar.
+
+        Sin force sólo se releen las carpetas cuyo mtime ha cambiado.
+        """
+        if self.scan_thread is not None:
+            self._rescan_pending = True
+            self._rescan_force = self._rescan_force or force
+            return
+        self.scan_thread = QThread()
+        self.scan_worker = LibraryScanWorker(self.library_index, self.lora_path, force=force,
+                                             workers=self.scan_workers)
+        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_worker.folder_scanned.connect(self._on_folder_scanned)
+        self.scan_worker.finished.connect(self._on_library_scanned)
+        self.scan_worker.error.connect(self._on_library_scan_error)
+        self.scan_thread.started.connect(self.scan_worker.run)
+        self.scan_thread.start()
+
+    def _finish_library_scan(self):
+        self.scan_thread.quit()
+        self.scan_thread.wait()
+        self.scan_thread = None
+        if self._rescan_pending:
+            force = self._rescan_force
+            self._rescan_pending = self._rescan_force = False
+            self.rescan_library(force=force)
+
+    def _on_folder_scanned(self, changed, removed):
+        # La galería se va rellenando según el escaneo termina cada carpeta
+        self._scan_changed += changed
+        self._scan_removed += removed
+        if not self._scan_flush_timer.isActive():
+            self._scan_flush_timer.start()
+
+    def _flush_scanned(self):
+        changed, self._scan_changed = self._scan_changed, []
+        removed, self._scan_removed = self._scan_removed, []
+        if len(changed) + len(removed) > SCAN_BATCH_RELOAD:
+            # Demasiadas inserciones sueltas: recargar la carpeta de una vez
+            self.load_loras()
+            return
+        self.update_lora_entries(changed, removed)
+
+    def _on_library_scanned(self, added, updated, removed):
+        stats = self.library_index.last_scan
+        message = (f"Biblioteca: {stats['dirs']} carpetas, {stats['dirs_skipped']} sin cambios "
+                   f"({stats['stats_avoided']} accesos a disco evitados); "
+                   f"{added} nuevos, {updated} actualizados, {removed} eliminados")
+        if stats.get('errors'):
+            message += f"; {stats['errors']} carpetas no se pudieron leer"
+        if 'walker' in stats:
+            message += f". {stats['walker']}"
+        self.statusBar().showMessage(message, 10000)
+        self._scan_flush_timer.stop()
+        self._flush_scanned()
+        self._finish_library_scan()
+        self.watch_library()
+        if added or updated or removed:
+            self.update_folder_combo()
+            self.load_model_filter_options()
+
+    def _on_library_scan_error(self, msg):
+        print(f"Error escaneando la biblioteca: {msg}")
+        self._finish_library_scan()
+
+    def cancel_hidden_thumbnails(self):
+        """Cancela las miniaturas pendientes que ya no están a la vista."""
+        self.gallery_model.cancel_hidden_thumbnails(self.gallery_view)
+
+    def _facet_selection(self):
+        """Filtros de faceta activos ({faceta: valor}); el de modelo base sale de selected_model_filter."""
+        selection = {facet: value for facet, value in self.facet_filters.items()
+                     if facet in FACETS and facet != 'base_model' and value is not None}
+        if self.selected_model_filter != "(All)":
+            selection['base_model'] = self.selected_model_filter
+        return selection
+
+    def lora_matches_filter(self, entry):
+        """Indica si una entrada (ya indexada) pasa la búsqueda y los filtros de faceta."""
+        if not self.facet_index.matches(entry.path, self._facet_selection()):
+            return False
+        free_text, terms = parse_query(self.search_box.text())
+        if terms and not self.library_index.match_metadata(terms, path=entry.path):
+            return False
+        return self.search_index.score(entry.path, free_text) > 0
+
+    def on_facet_changed(self, facet):
+        value = self.facet_combos[facet].value()
+        if facet == 'base_model':
+            self.selected_model_filter = "(All)" if value is None else value
+        else:
+            self.facet_filters[facet] = value
+        self.save_settings()  # Guardar los filtros cada vez que cambien
+        self.filter_loras()
+
+    def update_facet_counts(self):
+        """Recalcula el número de LORAs de cada valor de faceta con los filtros actuales.
+
+        Cada faceta se cuenta con la búsqueda y los filtros de las demás
+        facetas aplicados: cada recuento es un AND de bitmaps y un bit_count.
+        """
+        self._facet_counts_timer.stop()
+        selection = self._facet_selection()
+        for facet, combo in self.facet_combos.items():
+            counts = self.facet_index.counts(facet, selection, self._facet_scope)
+            values = set(counts) | set(self._base_model_catalogue) if facet == 'base_model' else None
+            combo.set_counts(counts, values, selection.get(facet))
+
+    def _search_scores(self):
+        """{ruta: puntuación} de la búsqueda actual (None si el cuadro está vacío)."""
+        free_text, terms = parse_query(self.search_box.text())
+        scores = self.search_index.search(free_text)
+        if terms:
+            matched = self.library_index.match_metadata(terms, folder=self._current_folder())
+            if matched is not None:
+                if scores is None:
+                    scores = dict.fromkeys(matched, 0.0)
+                else:
+                    scores = {path: score for path, score in scores.items() if path in matched}
+        return scores
+
+    def _refresh_facet_counts(self):
+        # Tras cambios en vivo el bitmap de la búsqueda ya no vale (bits reutilizados)
+        if self._facet_scope is not None:
+            scores = self._search_scores()
+            self._facet_scope = None if scores is None else self.facet_index.bitmap(scores)
+        # Un .json nuevo o cambiado puede haber añadido o retirado un modelo base
+        self.load_model_filter_options()
+
     def filter_loras(self):
-        self.save_settings()  # Guardar el filtro cada vez que cambie
-        # Clear existing thumbnails
-        for i in reversed(range(self.thumbnail_layout.count())): 
-            self.thumbnail_layout.itemAt(i).widget().setParent(None)
-        # Get search text
-        search_text = self.search_box.text().lower()
-        # Get model filter
-        selected_model = self.model_filter_combo.currentText()
-        if selected_model == "(All)":
-            selected_model = None
-        # Filter and display thumbnails
-        row = 0
-        col = 0
-        container_width = self.thumbnail_scroll.viewport().width()
-        self.thumbnail_widget.setFixedWidth(container_width)
-        spacing = self.thumbnail_layout.spacing()
-        max_cols = max(1, int((container_width + spacing) // (self.thumbnail_size + spacing)))
-        for search_key, widget in self.all_thumbnail_widgets.items():
-            # --- NUEVO: Filtrado por modelo base ---
-            passes_model = True
-            if selected_model:
-                # Obtener el path del LORA desde el widget
-                lora_path = None
-                # Buscar QLabel con el path en el widget
-                for child in widget.findChildren(QLabel):
-                    if child.text() == search_key.split()[0]:
-                        lora_path = child.text()
-                        break
-                # Alternativamente, obtener el path del widget si está guardado
-                # Pero mejor: usar el path del archivo desde el search_key
-                # Extraer el path real del archivo .safetensors
-                # El search_key es 'lora_name rel_path', pero el path real está en el dict
-                # Así que mejor guardar self.lora_base_model_map en load_loras
-                lora_base_model = self.lora_base_model_map.get(search_key)
-                passes_model = (lora_base_model == selected_model)
-            if search_text in search_key and passes_model:
-                self.thumbnail_layout.addWidget(widget, row, col)
-                col += 1
-                if col >= max_cols:
-                    col = 0
-                    row += 1
+        """Aplica la búsqueda y el filtro de modelo base a la galería.
+
+        Sin texto de búsqueda se mantiene el orden por carpeta y nombre; con
+        texto, las entradas se ordenan por relevancia. Los operadores campo:valor
+        se resuelven en el índice de texto completo de la biblioteca.
+        """
+        self._search_timer.stop()
+        entries = self.gallery_model.entries()
+        selection = self._facet_selection()
+        scores = self._search_scores()
+        facets = self.facet_index
+        self._facet_scope = None if scores is None else facets.bitmap(scores)
+        if scores is None and not selection:
+            rows = list(range(len(entries)))
+        else:
+            # Sin facetas elegidas las claves del bitmap son las de la búsqueda: no hace falta recorrerlo
+            keys = scores if not selection else facets.keys(facets.select(selection, self._facet_scope))
+            rows = [i for i in map(self.gallery_model.index_of, keys) if i is not None]
+        # Las entradas añadidas en vivo van al final de entries(): ordenar por carpeta y nombre
+        rows.sort(key=self.gallery_model.sort_ranks().__getitem__)
+        if scores is not None:
+            rows.sort(key=lambda i: -scores[entries[i].path])  # Estable: empates por carpeta y nombre
+        self.gallery_model.set_visible_rows(rows)
+        self.update_facet_counts()
+        # Cancelar las miniaturas filtradas o fuera de pantalla
+        self._thumb_prune_timer.start()
 
     def apply_selection(self):
-        # Create symbolic links for selected LORAs
+        """Despliega en output_path los LORAs seleccionados con todos sus archivos asociados.
+
+        Por defecto se enlazan en vez de copiarse (ver deploy.Deployer), así
+        que aplicar muchos modelos de varios GB es casi instantáneo.
+        """
+        deployer = Deployer(self.deploy_mode)
+        os.makedirs(self.output_path, exist_ok=True)
+        groups_by_dir = {}  # Cada carpeta se lee una sola vez
+        skipped = 0
         for lora_path in self.selected_applied_loras:
             lora_dir = os.path.dirname(lora_path)
             lora_name = os.path.splitext(os.path.basename(lora_path))[0]
+            if lora_dir not in groups_by_dir:
+                groups_by_dir[lora_dir] = scan_sidecars(lora_dir)[0]
+            group = groups_by_dir[lora_dir].get(lora_name.lower())
+            if group is None:
+                continue
             # Get all associated files
-            for file in os.listdir(lora_dir):
+            for file in group.files:
                 file_path = os.path.join(lora_dir, file)
-                if not os.path.isfile(file_path):
-                    continue
                 # Skip files that are not part of this LORA
                 file_base = os.path.splitext(file)[0]
                 if not (file_base == lora_name or file.startswith(f"{lora_name}.preview")):
                     continue
                 # Create target path with the same filename
                 target_path = os.path.join(self.output_path, file)
-                # Remove existing link if it exists
-                if os.path.exists(target_path):
-                    if os.path.islink(target_path):
-                        os.unlink(target_path)
-                    else:
-                        print(f"Warning: {target_path} exists and is not a symbolic link")
-                        continue
-                # Just before symlink, check again
-                if not os.path.exists(file_path):
-                    print(f"[DEBUG] Skipping missing file: {file_path}")
+                # Sólo se sustituye lo que ya era un despliegue de este archivo
+                if os.path.lexists(target_path) and not is_deployed_copy(file_path, target_path):
+                    print(f"Warning: {target_path} exists and is not a deployment of {file_path}")
+                    skipped += 1
                     continue
-                else:
-                    print(f"[DEBUG] File exists and will be linked: {file_path}")
-                    print(f"[DEBUG] Fuente: {file_path}")
-                    print(f"    - exists: {os.path.exists(file_path)}")
-                    print(f"    - isfile: {os.path.isfile(file_path)}")
-                    try:
-                        stat = os.stat(file_path)
-                        print(f"    - size: {stat.st_size} bytes")
-                        print(f"    - permissions: {oct(stat.st_mode)}")
-                    except Exception as e:
-                        print(f"    - stat error: {e}")
-                    print(f"[DEBUG] Destino: {target_path}")
-                    print(f"    - exists: {os.path.exists(target_path)}")
-                    print(f"    - islink: {os.path.islink(target_path)}")
-                    print(f"    - dirname exists: {os.path.exists(os.path.dirname(target_path))}")
                 try:
-                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                    shutil.copy2(file_path, target_path)
-                    print(f"[DEBUG] Copied file: {file_path} -> {target_path}")
-                except Exception as e:
-                    print(f"[DEBUG] Exception copying file for {file}: {e}")
-                    traceback.print_exc()
+                    deployer.deploy(file_path, target_path)
+                except OSError as e:
+                    print(f"Error deploying {file_path}: {e}")
+                    skipped += 1
+        message = f"Aplicados: {deployer.summary()}"
+        if skipped:
+            message += f" ({skipped} archivos omitidos)"
+        self.statusBar().showMessage(message, 10000)
         # Refresh the selected list
         self.refresh_selected_list()
         self.selected_applied_loras.clear()
@@ -999,25 +1230,25 @@ class LoraManager(QMainWindow):
     def zoom_in(self):
         if self.thumbnail_size < 500:
             self.thumbnail_size += 50
-            self.load_loras()
-            self.refresh_selected_list()
+            self.update_thumbnail_size()
             self.save_settings()
     
     def zoom_out(self):
         if self.thumbnail_size > 100:
             self.thumbnail_size -= 50
-            self.load_loras()
-            self.refresh_selected_list()
+            self.update_thumbnail_size()
             self.save_settings()
 
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        QTimer.singleShot(0, self.load_loras)
-        QTimer.singleShot(0, self.refresh_selected_list)
+    def update_thumbnail_size(self):
+        """Aplica el zoom a las vistas: sólo recoloca, sin releer el disco."""
+        for model, view, delegate in ((self.gallery_model, self.gallery_view, self.gallery_delegate),
+                                      (self.applied_model, self.selected_view, self.applied_delegate)):
+            set_gallery_item_size(view, delegate, self.thumbnail_size)
+            model.set_thumbnail_size(self.thumbnail_size)
+        self.update_selected_view_height()
 
     def toggle_sidebar(self):
         self.set_sidebar_visible(not self.sidebar_visible)
-        QTimer.singleShot(0, self.load_loras)
 
     def update_folder_combo(self):
         # Muestra subcarpetas de la carpeta seleccionada y opción de volver a la carpeta padre
@@ -1049,10 +1280,9 @@ class LoraManager(QMainWindow):
         # Opciones del combo: '.. (Parent)' y subcarpetas
         if rel_current != ".":
             self.folder_combo.addItem(".. (Parent)", "..")
-        for entry in sorted(os.listdir(current_path)):
+        for entry in self.library_index.subfolders(current_path):
             full_path = os.path.join(current_path, entry)
-            if os.path.isdir(full_path) and os.listdir(full_path):
-                self.folder_combo.addItem(entry, os.path.relpath(full_path, self.lora_path))
+            self.folder_combo.addItem(entry, os.path.relpath(full_path, self.lora_path))
         # Selecciona la opción correspondiente a la carpeta guardada
         if rel_current == ".":
             self.folder_combo.setCurrentIndex(-1)
@@ -1088,6 +1318,11 @@ class LoraManager(QMainWindow):
     def closeEvent(self, event):
         self.set_sidebar_visible(self.sidebar.isVisible())
         self.save_settings()
+        self.thumbnail_cache.save()
+        if self.scan_thread is not None:
+            self.scan_worker.abort()
+            self.scan_thread.quit()
+            self.scan_thread.wait()
         super().closeEvent(event)
 
     def set_sidebar_visible(self, visible):
@@ -1099,9 +1334,23 @@ class LoraManager(QMainWindow):
         self.civitai_api_key = text
         self.save_settings()
 
+    def on_deploy_mode_changed(self, *args):
+        self.deploy_mode = self.deploy_mode_combo.currentData()
+        self.save_settings()
+
+    def on_civitai_scope_changed(self, *args):
+        self.civitai_sync_scope = self.civitai_scope_combo.currentData()
+        self.civitai_stale_days = self.civitai_stale_days_spin.value()
+        self.civitai_stale_days_spin.setEnabled(self.civitai_sync_scope == "stale")
+        self.save_settings()
+
     def on_civitai_update_clicked(self):
         api_key = getattr(self, 'civitai_api_key', '')
-        lora_folder = self.lora_path if not self.selected_lora_subfolder else os.path.join(self.lora_path, self.selected_lora_subfolder)
+        scope = self.civitai_sync_scope
+        if scope == "folder":
+            lora_folder = self.lora_path if not self.selected_lora_subfolder else os.path.join(self.lora_path, self.selected_lora_subfolder)
+        else:
+            lora_folder = self.lora_path
         # Deshabilitar controles
         self.civitai_update_btn.setText("Abortar")
         self.civitai_update_btn.setStyleSheet("background-color: #b71c1c; color: white; font-weight: bold;")
@@ -1114,6 +1363,7 @@ class LoraManager(QMainWindow):
         # Resetear contadores
         self.civitai_summary_label_previews.setText("0")
         self.civitai_summary_label_json.setText("0")
+        self.civitai_summary_label_cache.setText("-")
         self.civitai_count_previews = 0
         self.civitai_count_json = 0
         # Crear y mostrar ventana de log
@@ -1122,7 +1372,23 @@ class LoraManager(QMainWindow):
         self.log_dialog.show()
         # Lanzar worker en un hilo
         self.worker_thread = QThread()
-        self.worker = CivitaiWorker(api_key, lora_folder)
+        self.worker = CivitaiWorker(
+            api_key, lora_folder,
+            hash_workers=self.civitai_hash_workers,
+            lookup_workers=self.civitai_lookup_workers,
+            download_workers=self.civitai_download_workers,
+            hit_ttl_days=self.civitai_hit_ttl_days,
+            miss_ttl_days=self.civitai_miss_ttl_days,
+            force_refresh=self.civitai_force_refresh_check.isChecked(),
+            lookup_batch_size=self.civitai_lookup_batch_size,
+            scope=scope,
+            stale_days=self.civitai_stale_days,
+            selection=self.selected_applied_loras,
+            download_concurrency=self.civitai_download_concurrency,
+            download_per_host=self.civitai_download_per_host,
+            download_max_kbps=self.civitai_download_max_kbps,
+            walk_workers=self.scan_workers,
+        )
         self.worker.moveToThread(self.worker_thread)
         self.worker.log_signal.connect(self.log_dialog.append_log)
         self.worker.finished.connect(self._on_civitai_update_finished)
@@ -1130,6 +1396,8 @@ class LoraManager(QMainWindow):
         self.worker.progress.connect(self._on_civitai_progress)
         self.worker.preview_downloaded.connect(self._on_civitai_preview_downloaded)
         self.worker.json_updated.connect(self._on_civitai_json_updated)
+        self.worker.cache_stats.connect(self._on_civitai_cache_stats)
+        self.worker.model_synced.connect(self._on_lora_synced)
         self.worker_thread.started.connect(self.worker.run)
         self.worker_thread.start()
 
@@ -1151,7 +1419,7 @@ class LoraManager(QMainWindow):
         self.civitai_progress.setFormat("100%")
         self.worker_thread.quit()
         self.worker_thread.wait()
-        self.load_loras()
+        # La galería ya se actualizó en vivo modelo a modelo (model_synced)
         self.refresh_selected_list()
 
     def _on_civitai_update_error(self, msg):
@@ -1184,46 +1452,24 @@ class LoraManager(QMainWindow):
         self.civitai_count_json += 1
         self.civitai_summary_label_json.setText(str(self.civitai_count_json))
 
-    def on_update_base_models_clicked(self):
-        try:
-            files = glob.glob(os.path.join(self.lora_path, '**/*.json'), recursive=True) + glob.glob(os.path.join(self.lora_path, '*.json'))
-            s = set()
-            for f in files:
-                try:
-                    with open(f, 'r', encoding='utf-8') as jf:
-                        data = json.load(jf)
-                        val = data.get('baseModel')
-                        if val:
-                            s.add(val)
-                except Exception:
-                    continue
-            out_path = self.base_models_path  # <--- USAR RUTA RELATIVA
-            # No hace falta crear el directorio, es el actual
-            with open(out_path, 'w', encoding='utf-8') as outf:
-                json.dump(sorted(s), outf, ensure_ascii=False, indent=2)
-            QMessageBox.information(self, "Filtro actualizado", f"Se han guardado {len(s)} modelos base únicos en base_models.json")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error actualizando base_models.json:\n{e}\n{traceback.format_exc()}")
+    def _on_civitai_cache_stats(self, cached, total):
+        if total > 0:
+            self.civitai_summary_label_cache.setText(f"{cached}/{total} ({cached * 100 // total}%)")
+        else:
+            self.civitai_summary_label_cache.setText("-")
+
+    def on_full_rescan_clicked(self):
+        # Sin instantáneas: lista cada carpeta y relee lo que haya cambiado
+        self.rescan_library(force=True)
 
     def load_model_filter_options(self):
-        self.model_filter_combo.blockSignals(True)
-        self.model_filter_combo.clear()
-        self.model_filter_combo.addItem("(All)")
+        # Todos los modelos base de la biblioteca, aunque no haya ninguno en la carpeta actual;
+        # el índice mantiene el catálogo al día, leerlo es una consulta sobre unas pocas filas
         try:
-            path = self.base_models_path  # <--- USAR RUTA RELATIVA
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    models = json.load(f)
-                for m in models:
-                    self.model_filter_combo.addItem(str(m))
-            # Restaurar el filtro guardado
-            saved_filter = getattr(self, 'selected_model_filter', "(All)")
-            index = self.model_filter_combo.findText(saved_filter)
-            if index >= 0:
-                self.model_filter_combo.setCurrentIndex(index)
+            self._base_model_catalogue = self.library_index.base_models()
         except Exception as e:
-            print(f"Error loading base_models.json: {e}")
-        self.model_filter_combo.blockSignals(False)
+            print(f"Error loading base models: {e}")
+        self.update_facet_counts()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,127 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()  # Marca de fin del recorrido
+
+
+def list_dir(folder):
+    """Visita por defecto: un os.scandir que separa subcarpetas y archivos.
+
+    Devuelve (subcarpetas, archivos) con las subcarpetas como rutas y los
+    archivos como nombres.
+    """
+    files, subdirs = [], []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            else:
+                files.append(entry.name)
+    return subdirs, files
+
+
+class ParallelWalker:
+    """Recorre un árbol de carpetas con un pool de hilos acotado.
+
+    En montajes de red o discos externos listar una carpeta cuesta sobre todo
+    latencia, así que varias carpetas se listan a la vez (max_workers). walk()
+    es un generador que entrega cada carpeta en cuanto se ha visitado, sin
+    esperar al final del recorrido; el orden no está garantizado. Las métricas
+    (carpetas, archivos, errores, tiempo) se actualizan durante el recorrido.
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        self.dirs = 0
+        self.files = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def walk(self, root, visit=None, recursive=True, abort_check=None):
+        """Genera (carpeta, resultado) por cada carpeta visitada bajo root.
+
+        visit(carpeta) debe devolver (subcarpetas, resultado); por defecto es
+        list_dir y el resultado es la lista de archivos. Las carpetas cuya
+        visita falla se cuentan en errors y no se entregan (ni se recorren sus
+        subcarpetas).
+        """
+        visit = visit or list_dir
+        results = queue.Queue()
+        pending = [0]
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="walker")
+        start = time.perf_counter()
+
+        def submit(folder):
+            with self._lock:
+                pending[0] += 1
+            pool.submit(task, folder)
+
+        def task(folder):
+            try:
+                if stop.is_set() or (abort_check and abort_check()):
+                    stop.set()
+                    return
+                try:
+                    subdirs, result = visit(folder)
+                except Exception:
+                    # No sólo OSError: un fallo de la visita (p. ej. de SQLite) no
+                    # puede perderse en el futuro del pool sin contarse
+                    with self._lock:
+                        self.errors += 1
+                    return
+                with self._lock:
+                    self.dirs += 1
+                    if visit is list_dir:
+                        self.files += len(result)
+                if recursive:
+                    for sub in subdirs:
+                        submit(sub)
+                results.put((folder, result))
+            finally:
+                with self._lock:
+                    pending[0] -= 1
+                    last = pending[0] == 0
+                if last:
+                    results.put(_DONE)
+
+        submit(root)
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            # También si el consumidor deja de iterar antes de tiempo
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.elapsed += time.perf_counter() - start
+
+    def iter_models(self, root, recursive=True, abort_check=None, extension='.safetensors'):
+        """Genera (carpeta, archivo) de cada modelo según se van descubriendo."""
+        for folder, files in self.walk(root, recursive=recursive, abort_check=abort_check):
+            for file in files:
+                if file.lower().endswith(extension):
+                    yield folder, file
+
+    def count_files(self, n):
+        """Suma n archivos a las métricas; para visitas propias que no usan list_dir."""
+        with self._lock:
+            self.files += n
+
+    def rate(self):
+        """(carpetas/s, archivos/s) del tiempo acumulado de recorrido."""
+        if not self.elapsed:
+            return 0.0, 0.0
+        return self.dirs / self.elapsed, self.files / self.elapsed
+
+    def summary(self):
+        dirs_rate, files_rate = self.rate()
+        return (f"Recorrido: {self.dirs} carpetas, {self.files} archivos en {self.elapsed:.2f}s "
+                f"({dirs_rate:.0f} carpetas/s, {files_rate:.0f} archivos/s, {self.max_workers} hilos"
+                f"{f', {self.errors} errores' if self.errors else ''}).")
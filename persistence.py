@@ -0,0 +1,58 @@
+import os
+import json
+import threading
+
+# Carpeta de la aplicación: aquí se guardan las cachés y el índice de la biblioteca
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_json(path):
+    """Contenido de un JSON guardado con write_json ({} si no existe o está dañado)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_json(path, data):
+    """Escribe en un .tmp y lo mueve encima: nunca queda un archivo a medias."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class JsonStore:
+    """Base de las cachés que se guardan en un único archivo JSON.
+
+    Las subclases protegen su estado con self._lock, anotan cada cambio con
+    _touch() (dentro del lock) y devuelven en _snapshot() lo que hay que
+    escribir. save() sólo escribe si hay cambios; _touch() indica cuándo
+    toca un guardado automático (cada autosave_every cambios, 0 = nunca),
+    que la subclase hace con save() ya fuera del lock.
+    """
+
+    def __init__(self, cache_path, autosave_every=0):
+        self.cache_path = cache_path
+        self.autosave_every = autosave_every
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._pending = 0
+
+    def _snapshot(self):
+        raise NotImplementedError
+
+    def _touch(self, n=1):
+        self._pending += n
+        return bool(self.autosave_every and self._pending >= self.autosave_every)
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                data = self._snapshot()
+                self._pending = 0
+            write_json(self.cache_path, data)
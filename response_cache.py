@@ -0,0 +1,84 @@
+import os
+import time
+
+from persistence import APP_DIR, JsonStore, read_json
+
+RESPONSE_CACHE_PATH = os.path.join(APP_DIR, "civitai_cache.json")
+DAY = 24 * 60 * 60
+
+
+class ResponseCache(JsonStore):
+    """Caché persistente de respuestas de /model-versions/by-hash.
+
+    Guarda tanto los aciertos (la respuesta JSON) como los fallos (404, hash que
+    Civitai no conoce), cada uno con su propio TTL. Es segura para varios hilos.
+    get() cuenta los aciertos; las consultas a la API las cuenta quien las
+    hace con count_lookups(), así que también salen con la caché ignorada.
+    """
+
+    def __init__(self, cache_path=None, hit_ttl=7 * DAY, miss_ttl=1 * DAY, autosave_every=50):
+        super().__init__(cache_path or RESPONSE_CACHE_PATH, autosave_every)
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+        self._entries = {}
+        self.hits = 0
+        self.negative_hits = 0
+        self.lookups = 0  # Hashes resueltos con una petición a la API
+        self.load()
+
+    def load(self):
+        self._entries = read_json(self.cache_path).get('entries', {})
+
+    def get(self, file_hash):
+        """Devuelve (encontrado, datos). datos es None si es un fallo cacheado."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(file_hash.lower())
+            if entry is not None:
+                ttl = self.hit_ttl if entry.get('data') is not None else self.miss_ttl
+                if now - entry.get('ts', 0) < ttl:
+                    if entry.get('data') is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return True, entry.get('data')
+                del self._entries[file_hash.lower()]
+            return False, None
+
+    def put(self, file_hash, data):
+        """Guarda una respuesta; data=None registra que Civitai no conoce el hash."""
+        with self._lock:
+            self._entries[file_hash.lower()] = {'ts': time.time(), 'data': data}
+            autosave = self._touch()
+        if autosave:
+            self.save()
+
+    def count_lookups(self, n=1):
+        """Registra n hashes consultados a la API."""
+        with self._lock:
+            self.lookups += n
+
+    def hit_rate(self):
+        total = self.hits + self.negative_hits + self.lookups
+        return (self.hits + self.negative_hits) / total if total else 0.0
+
+    def compact(self):
+        """Elimina las entradas caducadas."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                h for h, e in self._entries.items()
+                if now - e.get('ts', 0) >= (self.hit_ttl if e.get('data') is not None else self.miss_ttl)
+            ]
+            for h in expired:
+                del self._entries[h]
+            if expired:
+                self._touch(len(expired))
+        return len(expired)
+
+    def _snapshot(self):
+        return {'version': 1, 'entries': dict(self._entries)}
+
+    def close(self):
+        self.compact()
+        self.save()
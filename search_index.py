@@ -0,0 +1,232 @@
+import re
+import bisect
+import unicodedata
+from collections import Counter
+
+# Peso de cada campo al puntuar: nombre, trainedWords y carpeta
+FIELD_WEIGHTS = (3.0, 2.0, 1.0)
+# Calidad de la coincidencia de un término dentro de un campo
+EXACT_WORD, WORD_PREFIX, SUBSTRING = 1.0, 0.8, 0.6
+# Coincidencias aproximadas (sólo si el término no aparece literalmente en
+# ninguna palabra): términos de al menos FUZZY_MIN_LEN letras y palabras con
+# una similitud de trigramas (Dice) de al menos FUZZY_THRESHOLD
+FUZZY_MIN_LEN = 4
+FUZZY_THRESHOLD = 0.6
+FUZZY_WEIGHT = 1.0
+
+_SEPARATORS = re.compile(r"[\s_\-./\\,;:()\[\]{}'\"]+")
+_EMPTY = frozenset()
+
+
+def normalize(text):
+    """Minúsculas, sin acentos y con los separadores (_ - . / ...) como espacios."""
+    text = text.lower()
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def _grams(word):
+    """Trigramas de una palabra con dos espacios delante y uno detrás.
+
+    El relleno hace que también las palabras de una o dos letras tengan
+    trigramas; las consultas usan sólo los trigramas internos del término.
+    """
+    padded = "  " + word + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _term_grams(term):
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def _quality(term, word):
+    """Calidad de la coincidencia literal de term en word (0 si no aparece)."""
+    if term not in word:
+        return 0.0
+    if word == term:
+        return EXACT_WORD
+    return WORD_PREFIX if word.startswith(term) else SUBSTRING
+
+
+def _similarity(n_shared, term_grams, word):
+    """Coeficiente de Dice entre los trigramas internos del término y de la palabra."""
+    return 2.0 * n_shared / (term_grams + max(len(word) - 2, 1))
+
+
+class SearchIndex:
+    """Índice de trigramas en memoria para la búsqueda de la galería.
+
+    Cada documento (una ruta) tiene tres campos: nombre, trainedWords y
+    carpeta relativa, partidos en palabras. El índice tiene dos niveles:
+    trigrama -> palabras del vocabulario y palabra -> documentos con el peso
+    del mejor campo en que aparece. Un término de la consulta se resuelve
+    primero contra el vocabulario (mucho más pequeño que la biblioteca) como
+    palabra exacta, prefijo o subcadena; sólo si no aparece literalmente en
+    ninguna palabra se prueba, en términos largos, la coincidencia aproximada
+    por trigramas compartidos. Los términos de una o dos letras no tienen
+    trigramas y sólo encajan como prefijo, con una búsqueda binaria en el
+    vocabulario ordenado. search() devuelve los documentos que encajan con
+    todos los términos y su puntuación. Los documentos se indexan de forma
+    perezosa en la primera búsqueda (o al llamar a flush()).
+    """
+
+    def __init__(self):
+        self._docs = {}  # clave -> {palabra: peso del mejor campo}
+        self._pending = {}  # clave -> campos aún sin indexar
+        self._word_docs = {}  # palabra -> {clave: peso}
+        self._gram_words = {}  # trigrama -> set de palabras
+        self._vocab = []  # palabras de _word_docs ordenadas (None = por reordenar)
+
+    def __len__(self):
+        return len(self._docs) + len(self._pending)
+
+    def add(self, key, name, words=(), folder=""):
+        """Añade o sustituye un documento."""
+        self.remove(key)
+        self._pending[key] = (name, ' '.join(str(w) for w in words), folder)
+
+    def remove(self, key):
+        if self._pending.pop(key, None) is not None:
+            return
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for word in doc:
+            docs = self._word_docs[word]
+            del docs[key]
+            if not docs:
+                # Palabra que ya no usa ningún documento: fuera del vocabulario
+                del self._word_docs[word]
+                self._vocab = None
+                for gram in _grams(word):
+                    words = self._gram_words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._gram_words[gram]
+
+    def clear(self):
+        self._docs.clear()
+        self._pending.clear()
+        self._word_docs.clear()
+        self._gram_words.clear()
+        self._vocab = []
+
+    def flush(self):
+        """Indexa los documentos pendientes (search() lo hace si hace falta)."""
+        word_docs = self._word_docs
+        fields = tuple(reversed(FIELD_WEIGHTS))
+        for key, raw in self._pending.items():
+            # Del campo de menos peso al de más: cada palabra se queda con el mejor
+            doc = {}
+            for weight, text in zip(fields, reversed(raw)):
+                if text:
+                    doc.update(dict.fromkeys(normalize(text).split(), weight))
+            self._docs[key] = doc
+            for word, weight in doc.items():
+                docs = word_docs.get(word)
+                if docs is None:
+                    docs = word_docs[word] = {}
+                    self._vocab = None
+                    for gram in _grams(word):
+                        words = self._gram_words.get(gram)
+                        if words is None:
+                            words = self._gram_words[gram] = set()
+                        words.add(word)
+                docs[key] = weight
+        self._pending.clear()
+
+    def _prefix_words(self, prefix):
+        """Palabras del vocabulario que empiezan por prefix."""
+        if self._vocab is None:
+            self._vocab = sorted(self._word_docs)
+        vocab = self._vocab
+        i = bisect.bisect_left(vocab, prefix)
+        words = []
+        while i < len(vocab) and vocab[i].startswith(prefix):
+            words.append(vocab[i])
+            i += 1
+        return words
+
+    def _match_words(self, term):
+        """Palabras del vocabulario que encajan con term y la calidad de cada una."""
+        if len(term) < 3:
+            # Sin trigramas internos: sólo prefijos (una subcadena de una letra encaja con casi todo)
+            return {word: EXACT_WORD if word == term else WORD_PREFIX for word in self._prefix_words(term)}
+        grams = _term_grams(term)
+        postings = sorted((self._gram_words.get(g, _EMPTY) for g in grams), key=len)
+        candidates = postings[0].intersection(*postings[1:]) if postings[0] else _EMPTY
+        matches = {}
+        for word in candidates:
+            quality = _quality(term, word)
+            if quality:
+                matches[word] = quality
+        if not matches and len(term) >= FUZZY_MIN_LEN:
+            counts = Counter()
+            for gram in grams:
+                counts.update(self._gram_words.get(gram, _EMPTY))
+            for word, n in counts.items():
+                similarity = _similarity(n, len(grams), word)
+                if similarity >= FUZZY_THRESHOLD:
+                    matches[word] = FUZZY_WEIGHT * similarity
+        return matches
+
+    def _match_term(self, term, within=None):
+        """{clave: puntuación} de los documentos que encajan con term.
+
+        Con within (claves que ya encajan con otros términos) sólo se
+        puntúan esas, si son menos que las que aportaría el vocabulario.
+        """
+        matches = self._match_words(term)
+        postings = [(self._word_docs[word], quality) for word, quality in matches.items()]
+        scores = {}
+        if within is not None and len(within) < sum(len(docs) for docs, _ in postings):
+            for key in within:
+                doc = self._docs[key]
+                best = max((weight * matches[word] for word, weight in doc.items() if word in matches), default=0.0)
+                if best:
+                    scores[key] = best
+            return scores
+        for docs, quality in postings:
+            for key, weight in docs.items():
+                score = weight * quality
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+        return scores
+
+    def search(self, query):
+        """Puntuación de cada documento que encaja con query ({clave: puntuación}).
+
+        Devuelve None si la consulta está vacía (no hay nada que filtrar).
+        """
+        terms = normalize(query).split()
+        if not terms:
+            return None
+        self.flush()
+        scores = None
+        # Primero los términos más largos, que suelen ser los más selectivos
+        for term in sorted(set(terms), key=len, reverse=True):
+            term_scores = self._match_term(term, scores)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return {}
+        return scores
+
+    def score(self, key, query):
+        """Puntuación de un solo documento para query (0 si no encaja)."""
+        terms = normalize(query).split()
+        if not terms:
+            return 1.0
+        self.flush()
+        if key not in self._docs:
+            return 0.0
+        total = 0.0
+        for term in set(terms):
+            best = self._match_term(term, (key,)).get(key)
+            if not best:
+                return 0.0
+            total += best
+        return total
@@ -0,0 +1,81 @@
+import os
+
+from parallel_walker import list_dir
+
+PREVIEW_EXTS = ('.png', '.jpg', '.jpeg')
+CONFIG_EXTS = ('.yaml', '.yml', '.json')
+MODEL_EXT = '.safetensors'
+
+
+class SidecarGroup:
+    """Archivos de una carpeta que comparten nombre base con un modelo."""
+
+    __slots__ = ('model', 'previews', 'images', 'configs', 'files')
+
+    def __init__(self):
+        self.model = None  # nombre del .safetensors
+        self.previews = []  # nombre.preview.<ext> (imagen, .webp, .gif, .mp4...)
+        self.images = []  # nombre.<img>
+        self.configs = []  # nombre.yaml / .yml / .json
+        self.files = []  # todos los anteriores y cualquier otro nombre.<ext>
+
+    def preview(self, folder):
+        """Ruta del preview del modelo (o la del preview.png de la carpeta si no tiene).
+
+        Sólo cuentan los previews con extensión de imagen (PREVIEW_EXTS).
+        """
+        for name in self.previews:
+            if name.lower().endswith(PREVIEW_EXTS):
+                return os.path.join(folder, name)
+        if self.images:
+            return os.path.join(folder, self.images[0])
+        return os.path.join(folder, "preview.png")
+
+    def config(self, folder, lora_name):
+        for name in self.configs:
+            if os.path.splitext(name)[0] == lora_name:
+                return os.path.join(folder, name)
+        return None
+
+
+def _base_name(name):
+    """Nombre base en minúsculas: sin extensión y sin el sufijo .preview (con cualquier extensión)."""
+    stem = os.path.splitext(name)[0]
+    if stem.lower().endswith('.preview'):
+        stem = stem[:-len('.preview')]
+    return stem.lower()
+
+
+def group_sidecars(names):
+    """Agrupa los nombres de archivo de una carpeta por nombre base en una sola pasada.
+
+    Devuelve un dict {nombre base en minúsculas: SidecarGroup}; sustituye a
+    recorrer el listado completo de la carpeta por cada modelo.
+    """
+    groups = {}
+    for name in names:
+        lower = name.lower()
+        key = _base_name(name)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = SidecarGroup()
+        group.files.append(name)
+        if lower.endswith(MODEL_EXT):
+            group.model = name
+        elif os.path.splitext(lower)[0].endswith('.preview'):
+            group.previews.append(name)
+        elif lower.endswith(PREVIEW_EXTS):
+            group.images.append(name)
+        elif lower.endswith(CONFIG_EXTS):
+            group.configs.append(name)
+    return groups
+
+
+def scan_sidecars(folder):
+    """Lee una carpeta con un único os.scandir.
+
+    Devuelve (grupos, archivos, subcarpetas) con los grupos de group_sidecars,
+    la lista de nombres de archivo y las rutas de las subcarpetas.
+    """
+    subdirs, files = list_dir(folder)
+    return group_sidecars(files), files, subdirs
@@ -0,0 +1,256 @@
+import os
+import time
+import queue
+import threading
+from hashing import HashAborted
+from parallel_walker import ParallelWalker
+
+_DONE = object()  # Marca de fin de etapa
+
+# Alcances de sincronización: sólo sin .json, sólo .json antiguos, carpeta
+# actual, selección de la galería o biblioteca completa
+SYNC_SCOPES = ("missing", "stale", "folder", "selection", "full")
+
+
+def build_work_set(root, scope="full", stale_days=30, selection=None, index=None, workers=8):
+    """Calcula qué safetensors hay que sincronizar según el alcance.
+
+    Devuelve (items, skipped) con items como lista de (carpeta, archivo) y
+    skipped el número de safetensors descartados por el filtro. Con index
+    (LibraryIndex) se consulta el índice de la biblioteca; sin él se recorre
+    el disco con walk_work_set (ordenado dentro de cada carpeta, no entre
+    carpetas).
+    """
+    if scope not in SYNC_SCOPES:
+        raise ValueError(f"Alcance de sincronización desconocido: {scope}")
+    if scope == "selection":
+        items = [os.path.split(p) for p in sorted(selection or []) if p.lower().endswith('.safetensors')]
+        return items, 0
+    items = []
+    skipped = 0
+    cutoff = time.time() - stale_days * 24 * 60 * 60
+    if index is not None:
+        for row in index.models(root):
+            json_mtime_ns = row['json_mtime_ns']
+            if json_mtime_ns is not None and (scope == "missing" or (scope == "stale" and json_mtime_ns / 1e9 >= cutoff)):
+                skipped += 1
+                continue
+            items.append(os.path.split(row['path']))
+        return items, skipped
+    stats = {'skipped': 0}
+    items = list(walk_work_set(root, scope, stale_days, workers, stats=stats))
+    return items, stats['skipped']
+
+
+def walk_work_set(root, scope="full", stale_days=30, workers=8, stats=None, abort_check=None):
+    """Genera (carpeta, archivo) de los safetensors a sincronizar según se recorre el disco.
+
+    Cada carpeta se entrega, ordenada, en cuanto el ParallelWalker la lista,
+    así que SyncPipeline.run puede empezar a hashear antes de que termine el
+    recorrido. Para "stale" se hace stat del .json. stats['skipped'] cuenta
+    los safetensors descartados por el alcance ("selection" no aplica aquí).
+    """
+    if scope not in SYNC_SCOPES or scope == "selection":
+        raise ValueError(f"Alcance de sincronización no válido para recorrer el disco: {scope}")
+    if stats is None:
+        stats = {}
+    stats.setdefault('skipped', 0)
+    cutoff = time.time() - stale_days * 24 * 60 * 60
+    for dirpath, files in ParallelWalker(workers).walk(root, abort_check=abort_check):
+        names = set(files)
+        # El recorrido paralelo no garantiza orden entre carpetas; dentro de cada una, sí
+        for file in sorted(files):
+            if not file.lower().endswith('.safetensors'):
+                continue
+            json_name = os.path.splitext(file)[0] + ".json"
+            if scope == "missing" and json_name in names:
+                stats['skipped'] += 1
+                continue
+            if scope == "stale" and json_name in names:
+                try:
+                    if os.stat(os.path.join(dirpath, json_name)).st_mtime >= cutoff:
+                        stats['skipped'] += 1
+                        continue
+                except OSError:
+                    pass
+            yield dirpath, file
+
+
+class SyncPipeline:
+    """Pipeline hash → consulta Civitai → descarga con colas acotadas entre etapas.
+
+    Cada etapa tiene su propio pool de hilos, de modo que el hashing (disco/CPU)
+    se solapa con las llamadas HTTP y las descargas. Las colas acotadas evitan
+    que una etapa rápida acumule trabajo sin límite delante de una lenta.
+    """
+
+    def __init__(self, api, hash_workers=2, lookup_workers=4, download_workers=4,
+                 queue_size=64, log_func=None, progress_func=None, abort_check=None,
+                 lookup_batch_size=100, batch_wait=0.5, synced_func=None):
+        self.api = api
+        # synced_func(ruta, sha256) se llama al terminar de actualizar cada modelo
+        self.synced_func = synced_func
+        # Con lookup_batch_size > 1 la etapa de consulta acumula hashes y los
+        # resuelve en bloque; espera como mucho batch_wait segundos a completar un bloque
+        self.lookup_batch_size = max(1, int(lookup_batch_size))
+        self.batch_wait = batch_wait
+        self.hash_workers = max(1, int(hash_workers))
+        self.lookup_workers = max(1, int(lookup_workers))
+        self.download_workers = max(1, int(download_workers))
+        self.queue_size = queue_size
+        self.log_func = log_func
+        self.progress_func = progress_func
+        self.abort_check = abort_check or (lambda: False)
+        self._lock = threading.Lock()
+        self.ok = 0
+        self.fail = 0
+        self.processed = 0
+        self.total = 0
+
+    def _log(self, text):
+        if self.log_func:
+            self.log_func(text)
+
+    def _finish_item(self, success):
+        with self._lock:
+            if success:
+                self.ok += 1
+            else:
+                self.fail += 1
+            self.processed += 1
+            processed = self.processed
+        if self.progress_func:
+            self.progress_func(processed, self.total)
+
+    def _stage(self, in_q, out_q, n_workers, n_next, handler, batch_size=1):
+        """Lanza n_workers hilos que consumen in_q; el último en terminar propaga el fin.
+
+        Con batch_size > 1 el handler recibe listas de elementos y devuelve una
+        lista de resultados; un bloque se procesa al llenarse o cuando la cola
+        lleva batch_wait segundos sin recibir nada.
+        """
+        remaining = [n_workers]
+
+        def process(items):
+            try:
+                results = handler(items) if batch_size > 1 else [handler(items[0])]
+            except Exception as e:
+                for item in items:
+                    self._log(f"❌ Error con {item[1]}: {e}")
+                    self._finish_item(False)
+                return
+            if out_q is not None:
+                for result in results:
+                    if result is not None:
+                        out_q.put(result)
+
+        def worker():
+            batch = []
+            done = False
+            while not done:
+                try:
+                    item = in_q.get(timeout=self.batch_wait if batch else None)
+                except queue.Empty:
+                    item = None
+                if item is _DONE:
+                    done = True
+                elif item is not None and not self.abort_check():
+                    batch.append(item)
+                # Si se aborta se sigue vaciando la cola para no bloquear a la etapa anterior
+                if batch and (done or item is None or len(batch) >= batch_size):
+                    if not self.abort_check():
+                        process(batch)
+                    batch = []
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and out_q is not None:
+                for _ in range(n_next):
+                    out_q.put(_DONE)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(n_workers)]
+        for t in threads:
+            t.start()
+        return threads
+
+    def _hash(self, item):
+        root, file = item
+        safetensor_path = os.path.join(root, file)
+        self._log(f"Calculando hash para: {safetensor_path}")
+        try:
+            file_hash = self.api.get_file_hash(safetensor_path, cancel_check=self.abort_check)
+        except HashAborted:
+            self._log(f"Hash de {file} interrumpido; se reanudará en la próxima sincronización.")
+            return None
+        self._log(f"Hash: {file_hash}")
+        return (root, file, file_hash)
+
+    def _lookup(self, item):
+        root, file, file_hash = item
+        model_info = self.api.get_model_info_by_hash(file_hash)
+        if not model_info:
+            self._log(f"❌ {file} no encontrado en Civitai.")
+            self._finish_item(False)
+            return None
+        self._log(f"Encontrado en Civitai: {file}. Descargando archivos...")
+        return (root, file, file_hash, model_info)
+
+    def _lookup_batch(self, items):
+        infos = self.api.get_model_info_by_hashes([h for _, _, h in items], batch_size=self.lookup_batch_size)
+        results = []
+        for root, file, file_hash in items:
+            model_info = infos.get(file_hash.lower())
+            if not model_info:
+                self._log(f"❌ {file} no encontrado en Civitai.")
+                self._finish_item(False)
+                continue
+            self._log(f"Encontrado en Civitai: {file}. Descargando archivos...")
+            results.append((root, file, file_hash, model_info))
+        return results
+
+    def _download(self, item):
+        root, file, file_hash, model_info = item
+        safetensor_path = os.path.join(root, file)
+        self.api.download_model_files(model_info, root, safetensor_path=safetensor_path)
+        if self.synced_func:
+            self.synced_func(safetensor_path, file_hash)
+        self._log(f"✔️ {file} actualizado.")
+        self._finish_item(True)
+        return None
+
+    def run(self, items):
+        """Procesa (carpeta, archivo) de items y devuelve (ok, fail).
+
+        items puede ser una lista o un generador (p. ej. walk_work_set): con
+        un generador el hashing empieza con la primera carpeta recorrida y
+        total va creciendo según llegan elementos.
+        """
+        streaming = not hasattr(items, '__len__')
+        self.total = 0 if streaming else len(items)
+        hash_q = queue.Queue(self.queue_size)
+        lookup_q = queue.Queue(self.queue_size)
+        download_q = queue.Queue(self.queue_size)
+        threads = []
+        threads += self._stage(hash_q, lookup_q, self.hash_workers, self.lookup_workers, self._hash)
+        if self.lookup_batch_size > 1:
+            threads += self._stage(lookup_q, download_q, self.lookup_workers, self.download_workers,
+                                   self._lookup_batch, batch_size=self.lookup_batch_size)
+        else:
+            threads += self._stage(lookup_q, download_q, self.lookup_workers, self.download_workers, self._lookup)
+        threads += self._stage(download_q, None, self.download_workers, 0, self._download)
+        try:
+            for item in items:
+                if self.abort_check():
+                    break
+                if streaming:
+                    with self._lock:
+                        self.total += 1
+                hash_q.put(item)
+        finally:
+            if streaming and hasattr(items, 'close'):
+                items.close()  # Detiene el recorrido si se aborta a medias
+        for _ in range(self.hash_workers):
+            hash_q.put(_DONE)
+        for t in threads:
+            t.join()
+        return self.ok, self.fail
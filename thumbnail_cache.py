@@ -0,0 +1,166 @@
+import os
+import time
+import hashlib
+
+from PIL import Image
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QColor
+
+from persistence import APP_DIR, JsonStore, read_json
+
+THUMBNAIL_CACHE_DIR = os.path.join(APP_DIR, "thumbnail_cache")
+THUMBNAIL_BACKGROUND = (45, 45, 45)  # Mismo gris que el fondo de las miniaturas
+
+
+def _pillow_to_qimage(img):
+    img = img.convert("RGBA")
+    data = img.tobytes("raw", "RGBA")
+    # copy(): el QImage no debe apuntar al buffer de Python
+    return QImage(data, img.width, img.height, 4 * img.width, QImage.Format.Format_RGBA8888).copy()
+
+
+def decode_thumbnail(path, size):
+    """Decodifica un preview directamente al tamaño de miniatura.
+
+    QImageReader.setScaledSize permite al decodificador reducir mientras lee
+    (en JPEG escala en el dominio DCT, sin decodificar la imagen completa).
+    Si Qt no sabe leer el formato se usa Pillow con draft() y se pasa el
+    resultado a QImage sin pasar por un PNG intermedio.
+    """
+    reader = QImageReader(path)
+    src = reader.size()
+    if src.isValid() and (src.width() > size or src.height() > size):
+        reader.setScaledSize(src.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull():
+        return image
+    img = Image.open(path)
+    img.draft("RGB", (size, size))
+    img.thumbnail((size, size))
+    return _pillow_to_qimage(img)
+
+
+def _flatten(image):
+    """Compone la transparencia sobre el fondo de las miniaturas (JPEG no tiene alfa)."""
+    if not image.hasAlphaChannel():
+        return image.convertToFormat(QImage.Format.Format_RGB32)
+    flat = QImage(image.size(), QImage.Format.Format_RGB32)
+    flat.fill(QColor(*THUMBNAIL_BACKGROUND))
+    painter = QPainter(flat)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return flat
+
+
+class ThumbnailCache(JsonStore):
+    """Caché en disco de miniaturas ya escaladas.
+
+    La clave combina ruta del preview, mtime, tamaño del archivo y tamaño de
+    miniatura pedido, así que un preview modificado genera una entrada nueva y
+    la antigua acaba saliendo por LRU. Las miniaturas se guardan como JPEG
+    pequeños (rápidos de decodificar) y el total se mantiene por debajo de
+    max_bytes eliminando primero las menos usadas. Es segura entre hilos.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024, quality=88):
+        self.cache_dir = cache_dir or THUMBNAIL_CACHE_DIR
+        super().__init__(os.path.join(self.cache_dir, "index.json"))
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self._entries = {}  # clave -> {'bytes', 'atime'}
+        self._total = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = read_json(self.cache_path).get('entries', {})
+        # Descartar entradas cuyo archivo ya no está
+        self._entries = {k: e for k, e in entries.items() if os.path.exists(self._file_for(k))}
+        self._total = sum(e.get('bytes', 0) for e in self._entries.values())
+
+    def _file_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".jpg")
+
+    @staticmethod
+    def make_key(preview_path, size, st=None):
+        if st is None:
+            st = os.stat(preview_path)
+        raw = f"{os.path.abspath(preview_path)}|{st.st_mtime_ns}|{st.st_size}|{int(size)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, preview_path, size):
+        """Ruta de la miniatura cacheada o None si no existe o el preview cambió."""
+        try:
+            key = self.make_key(preview_path, size)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry['atime'] = time.time()
+            self._touch()
+        return self._file_for(key)
+
+    def put(self, preview_path, size, image):
+        """Guarda una miniatura (QImage) y devuelve su ruta en la caché."""
+        key = self.make_key(preview_path, size)
+        path = self._file_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        if not _flatten(image).save(tmp_path, "JPG", self.quality):
+            raise OSError(f"No se pudo guardar la miniatura de {preview_path}")
+        os.replace(tmp_path, path)
+        nbytes = os.path.getsize(path)
+        with self._lock:
+            old = self._entries.get(key)
+            if old:
+                self._total -= old.get('bytes', 0)
+            self._entries[key] = {'bytes': nbytes, 'atime': time.time()}
+            self._total += nbytes
+            self._touch()
+            over_budget = self._total > self.max_bytes
+        if over_budget:
+            self.evict()
+        return path
+
+    def load(self, preview_path, size):
+        """Devuelve la miniatura como QImage, desde la caché o decodificando el preview."""
+        cached = self.get(preview_path, size)
+        if cached:
+            image = QImage(cached)
+            if not image.isNull():
+                return image
+        image = decode_thumbnail(preview_path, size)
+        if image.isNull():
+            return image
+        try:
+            self.put(preview_path, size, image)
+        except OSError:
+            pass
+        return image
+
+    def evict(self):
+        """Elimina las miniaturas menos usadas hasta quedar en el 90% del presupuesto."""
+        target = int(self.max_bytes * 0.9)
+        with self._lock:
+            if self._total <= target:
+                return 0
+            victims = []
+            for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1].get('atime', 0)):
+                if self._total <= target:
+                    break
+                victims.append(key)
+                self._total -= entry.get('bytes', 0)
+            for key in victims:
+                del self._entries[key]
+            self._touch()
+        for key in victims:
+            try:
+                os.remove(self._file_for(key))
+            except OSError:
+                pass
+        return len(victims)
+
+    def _snapshot(self):
+        return {'version': 1, 'entries': dict(self._entries)}
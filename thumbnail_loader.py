@@ -0,0 +1,98 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QImage
+
+# Prioridades del pool (mayor = antes)
+PRIORITY_VISIBLE = 2
+PRIORITY_APPLIED = 1
+PRIORITY_OFFSCREEN = 0
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, loader, key, preview_path, size, serial):
+        super().__init__()
+        self.setAutoDelete(False)  # La referencia la mantiene ThumbnailLoader._tasks
+        self.loader = loader
+        self.key = key
+        self.preview_path = preview_path
+        self.size = size
+        self.serial = serial
+        self.cancelled = False
+
+    def run(self):
+        image = QImage()
+        if not self.cancelled:
+            try:
+                image = self.loader.cache.load(self.preview_path, self.size)
+            except Exception:
+                image = QImage()
+        # Señal con conexión en cola: se entrega en el hilo de la GUI (también
+        # si se canceló en curso, para que el loader suelte su referencia)
+        self.loader._task_done.emit(self.key, image, self.serial)
+
+
+class ThumbnailLoader(QObject):
+    """Decodifica miniaturas en un pool de hilos fuera del hilo de la GUI.
+
+    request() encola (o re-prioriza) la miniatura de una clave; cancel()
+    retira lo que aún no ha empezado y hace que el resultado de una tarea ya
+    en curso se descarte. Los resultados llegan por la señal
+    loaded(clave, QImage) en el hilo de la GUI.
+    """
+
+    loaded = pyqtSignal(str, QImage)
+    _task_done = pyqtSignal(str, QImage, int)
+
+    def __init__(self, cache, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, min(max_threads, QThreadPool.globalInstance().maxThreadCount())))
+        self._tasks = {}  # clave -> (_ThumbnailTask, prioridad)
+        self._orphans = {}  # Tareas canceladas ya en ejecución (serial -> tarea)
+        self._serial = 0
+        self._task_done.connect(self._on_task_done)
+
+    def request(self, key, preview_path, size, priority=PRIORITY_OFFSCREEN):
+        current = self._tasks.get(key)
+        if current is not None:
+            task, current_priority = current
+            if task.preview_path == preview_path and task.size == size:
+                if current_priority == priority:
+                    return
+                # Re-priorizar sólo si todavía no ha empezado
+                if not self.pool.tryTake(task):
+                    return
+                self._tasks[key] = (task, priority)
+                self.pool.start(task, priority)
+                return
+            self.cancel(key)
+        self._serial += 1
+        task = _ThumbnailTask(self, key, preview_path, size, self._serial)
+        self._tasks[key] = (task, priority)
+        self.pool.start(task, priority)
+
+    def is_pending(self, key):
+        return key in self._tasks
+
+    def cancel(self, key):
+        current = self._tasks.pop(key, None)
+        if current is not None:
+            task = current[0]
+            task.cancelled = True
+            if not self.pool.tryTake(task):
+                # Ya se está ejecutando: mantenerla viva hasta que termine
+                self._orphans[task.serial] = task
+
+    def cancel_all(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    @pyqtSlot(str, QImage, int)
+    def _on_task_done(self, key, image, serial):
+        self._orphans.pop(serial, None)
+        current = self._tasks.get(key)
+        # Resultado de una tarea cancelada o sustituida por otra más reciente
+        if current is None or current[0].serial != serial:
+            return
+        del self._tasks[key]
+        self.loaded.emit(key, image)